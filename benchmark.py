@@ -0,0 +1,290 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from mock_mistral import CORPUS_FILE, MockMistral, load_corpus
+
+# Scripted player: mechanical commands answered locally, free-form actions that need the DM, and moves
+# along a random exit of the current room (which is where stub rooms get generated).
+LOCAL_ACTIONS = ["look", "i", "x me", "l", "inventory"]
+DM_ACTIONS = [
+    "jump", "look out window", "listen", "search the room", "sit down", "smell the air", "wait",
+    "check the time", "hum a tune", "knock on the wall", "stretch", "sigh loudly",
+]
+SCRIPT = ["local", "dm", "move", "local", "dm", "move", "dm"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "mean_ms": round(1000 * sum(samples) / len(samples), 2) if samples else 0.0,
+        "p50_ms": round(1000 * percentile(samples, 50), 2),
+        "p95_ms": round(1000 * percentile(samples, 95), 2),
+        "p99_ms": round(1000 * percentile(samples, 99), 2),
+        "max_ms": round(1000 * max(samples), 2) if samples else 0.0,
+    }
+
+
+def rss_mb():
+    # ru_maxrss is KiB on Linux: peak, not current, so it only ever grows between levels.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+
+
+class Session:
+    def __init__(self, app_module, seed, stream=False, explore=False):
+        self.main = app_module
+        self.client = app_module.app.test_client()
+        self.random = random.Random(seed)
+        self.stream = stream
+        self.explore = explore
+        self.exits = []
+        self.state = {}
+        self.timings = []  # (phase, seconds)
+
+    @property
+    def world(self):
+        cookie = self.client.get_cookie(self.main.SESSION_COOKIE)
+        return self.main.store.get(cookie.value) if cookie else None
+
+    def reset(self):
+        started = time.perf_counter()
+        resp = self.client.post('/reset')
+        self.timings.append(("reset", time.perf_counter() - started))
+        self._remember(resp.get_json())
+
+    def turn(self, kind):
+        if kind == "move" and self.exits:
+            text = self.random.choice(self._unexplored_exits() or self.exits)
+        elif kind == "dm":
+            text = self.random.choice(DM_ACTIONS)
+        else:
+            kind, text = "local", self.random.choice(LOCAL_ACTIONS)
+
+        started = time.perf_counter()
+        if self.stream:
+            self._remember(self._stream(text, kind, started))
+        else:
+            resp = self.client.post('/command', json={"input": text, "state_version": self.state.get('version')})
+            self._remember(resp.get_json())
+        self.timings.append((kind, time.perf_counter() - started))
+
+    def _unexplored_exits(self):
+        if not self.explore:
+            return []
+        world = self.world
+        exits = world.get_current_room().get('exits', {})
+        return [d for d, rid in exits.items() if not (world.get_room(rid) or {}).get('visited')]
+
+    def _stream(self, text, kind, started):
+        resp = self.client.post('/command/stream', json={"input": text, "state_version": self.state.get('version')},
+                                buffered=False)
+        first, body = None, []
+        for chunk in resp.response:
+            if first is None:
+                first = time.perf_counter() - started
+                self.timings.append((f"{kind}_first_event", first))
+            body.append(chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk)
+        resp.close()
+        for block in "".join(body).split("\n\n"):
+            if block.startswith("event: done"):
+                return json.loads(block.split("data: ", 1)[1])
+        return None
+
+    def _remember(self, result):
+        state = (result or {}).get('state')
+        if state:
+            self.state = dict(self.state, **state) if state.get('delta') else state
+            self.exits = self.state.get('exits', [])
+
+
+def drain_prefetch(main, sessions, timeout=60.0):
+    # Background room generation finishing late would otherwise bleed into the next level's numbers.
+    deadline = time.time() + timeout
+    worlds = [s.world for s in sessions]
+    while time.time() < deadline and any(main.prefetcher.pending(w) for w in worlds if w):
+        time.sleep(0.05)
+
+
+def world_size(world):
+    rooms = world.data.get('rooms', {})
+    generated = sum(1 for rid in rooms if not world.is_stub(rid))
+    return {"rooms": generated, "stubs": len(rooms) - generated, "items": len(world.data.get('items', {}))}
+
+
+def run_level(main, concurrency, turns, seed, stream):
+    sessions = [Session(main, seed * 1000 + n, stream) for n in range(concurrency)]
+    errors = []
+
+    def play(session):
+        try:
+            session.reset()
+            for n in range(turns):
+                session.turn(SCRIPT[n % len(SCRIPT)])
+        except Exception as e:
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=play, args=(s,)) for s in sessions]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    drain_prefetch(main, sessions)
+
+    phases = {}
+    for session in sessions:
+        for phase, seconds in session.timings:
+            phases.setdefault(phase, []).append(seconds)
+    requests_done = sum(len(v) for k, v in phases.items() if not k.endswith("_first_event"))
+    every = [s for k, v in phases.items() if not k.endswith("_first_event") for s in v]
+    return {
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "requests": requests_done,
+        "rps": round(requests_done / wall, 2) if wall else 0.0,
+        "overall": summarize(every),
+        "phases": {phase: summarize(samples) for phase, samples in sorted(phases.items())},
+        "rss_peak_mb": rss_mb(),
+        "errors": errors,
+    }
+
+
+def cold_load_ms(world):
+    # What a fresh worker pays on this world's first request: open the save, migrate, show the room.
+    started = time.perf_counter()
+    fresh = type(world)(world.save_file)
+    fresh.describe_room()
+    elapsed = time.perf_counter() - started
+    if hasattr(fresh.storage, 'close'):
+        fresh.storage.close()
+    return round(1000 * elapsed, 2)
+
+
+def run_growth(main, turns, sample_every, seed):
+    # One long session with tracemalloc on: memory and turn latency as the world keeps expanding.
+    tracemalloc.start()
+    session = Session(main, seed, explore=True)
+    session.reset()
+    baseline = tracemalloc.get_traced_memory()[0]
+    samples = []
+    window_start = len(session.timings)
+    for n in range(1, turns + 1):
+        session.turn(SCRIPT[n % len(SCRIPT)])
+        if n % sample_every == 0 or n == turns:
+            drain_prefetch(main, [session])
+            window = [s for _, s in session.timings[window_start:]]
+            window_start = len(session.timings)
+            current, peak = tracemalloc.get_traced_memory()
+            samples.append(dict(
+                turn=n,
+                **world_size(session.world),
+                traced_mb=round(current / 1048576.0, 2),
+                growth_mb=round((current - baseline) / 1048576.0, 2),
+                peak_mb=round(peak / 1048576.0, 2),
+                window_mean_ms=round(1000 * sum(window) / len(window), 2) if window else 0.0,
+                cold_load_ms=cold_load_ms(session.world),
+            ))
+    tracemalloc.stop()
+    return samples
+
+
+def print_report(config, levels, growth):
+    print(f"\nmock latency {config['latency']}s +/- {config['jitter']}s, {config['turns']} turns/session, "
+          f"stream={config['stream']}, prefetch={config['prefetch']}")
+    for level in levels:
+        print(f"\n== concurrency {level['concurrency']}: {level['requests']} requests in {level['wall_s']}s "
+              f"({level['rps']} req/s), peak RSS {level['rss_peak_mb']} MB")
+        print(f"  {'phase':<20}{'n':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+        for phase, s in list(level['phases'].items()) + [("ALL", level['overall'])]:
+            print(f"  {phase:<20}{s['count']:>6}{s['mean_ms']:>10}{s['p50_ms']:>10}"
+                  f"{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+        for error in level['errors']:
+            print(f"  ERROR {error}")
+    if growth:
+        print("\n== memory growth (single session)")
+        print(f"  {'turn':>6}{'rooms':>8}{'stubs':>8}{'items':>8}{'traced MB':>12}{'growth MB':>12}{'turn ms':>10}{'cold load ms':>14}")
+        for s in growth:
+            print(f"  {s['turn']:>6}{s['rooms']:>8}{s['stubs']:>8}{s['items']:>8}{s['traced_mb']:>12}"
+                  f"{s['growth_mb']:>12}{s['window_mean_ms']:>10}{s['cold_load_ms']:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Frotz benchmark against a local mock Mistral server.")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated session counts")
+    parser.add_argument("--turns", type=int, default=20, help="scripted commands per session after /reset")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock mean LLM latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="mock latency jitter (seconds)")
+    parser.add_argument("--branching", type=int, default=2, choices=range(0, 5),
+                        help="random exits per generated room (0 replays the recorded exits)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock calls failing with 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of mock calls hitting the slow tail")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="mock slow-tail latency (seconds)")
+    parser.add_argument("--small-speedup", type=float, default=1.0, help="mock latency divisor for the small model")
+    parser.add_argument("--stream", action="store_true", help="drive /command/stream instead of /command")
+    parser.add_argument("--no-prefetch", action="store_true", help="disable speculative room generation")
+    parser.add_argument("--growth-turns", type=int, default=100, help="turns in the memory growth run (0 to skip)")
+    parser.add_argument("--sample-every", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    mock = MockMistral(load_corpus(CORPUS_FILE), args.latency, args.jitter, args.error_rate,
+                       args.branching, seed=args.seed, slow_rate=args.slow_rate,
+                       slow_latency=args.slow_latency, small_speedup=args.small_speedup).start()
+    save_dir = tempfile.mkdtemp(prefix="frotz-bench-")
+
+    # The app reads its configuration at import time, so it is imported only once this is in place.
+    os.environ.update({
+        "MISTRAL_API_URL": mock.url,
+        "MISTRAL_API_KEY": os.environ.get("MISTRAL_API_KEY") or "benchmark",
+        "FROTZ_SAVE_DIR": save_dir,
+        "FROTZ_TELEMETRY_LEVEL": "off",
+        "FROTZ_PREFETCH": "0" if args.no_prefetch else "1",
+        "LLM_MAX_RETRIES": os.environ.get("LLM_MAX_RETRIES", "3"),
+    })
+    app_module = importlib.import_module("main")
+
+    config = {
+        "latency": args.latency, "jitter": args.jitter, "turns": args.turns,
+        "slow_rate": args.slow_rate, "slow_latency": args.slow_latency,
+        "stream": args.stream, "prefetch": not args.no_prefetch,
+    }
+    try:
+        levels = [run_level(app_module, int(c), args.turns, args.seed, args.stream)
+                  for c in args.concurrency.split(",") if c.strip()]
+        growth = run_growth(app_module, args.growth_turns, max(1, args.sample_every), args.seed) \
+            if args.growth_turns > 0 else []
+    finally:
+        mock.stop()
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+    print_report(config, levels, growth)
+    print(f"\nmock served {mock.requests} calls ({mock.errors} injected failures)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"config": config, "levels": levels, "growth": growth,
+                       "mock_calls": mock.requests}, f, indent=2)
+    return 1 if any(level['errors'] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
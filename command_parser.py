@@ -0,0 +1,113 @@
+import re
+
+# Ordered: the particle forms ("take off", "put on", "pick up") must be tried before the bare verbs.
+VERB_PATTERNS = [
+    ("remove", re.compile(r"^(?:take off|remove|doff|unwear)\s+(.+)$")),
+    ("remove", re.compile(r"^take\s+(.+?)\s+off$")),
+    ("wear", re.compile(r"^(?:put on|wear|don)\s+(.+)$")),
+    ("wear", re.compile(r"^put\s+(.+?)\s+on$")),
+    ("drop", re.compile(r"^(?:put down|set down|drop|discard)\s+(.+)$")),
+    ("drop", re.compile(r"^(?:put|set)\s+(.+?)\s+down$")),
+    ("take", re.compile(r"^pick\s+(.+?)\s+up$")),
+    ("take", re.compile(r"^(?:pick up|take|get|grab)\s+(.+)$")),
+    ("travel", re.compile(r"^(?:go|walk|run|head|return|travel)\s+(?:back\s+)?to\s+(?:the\s+)?(.+)$")),
+    ("travel", re.compile(r"^travel\s+(?:the\s+)?(.+)$")),
+    ("go", re.compile(r"^(?:go|walk|run|head|move)\s+(?:to\s+)?(?:the\s+)?(.+)$")),
+]
+
+# Nouns containing these words describe relations between objects; leave them to the DM.
+RELATION_WORDS = {"from", "with", "in", "into", "on", "onto", "under", "and", "all", "everything", "except"}
+
+# The schema has no wearable flag, so clothing is recognised by name unless an item says otherwise.
+CLOTHING_WORDS = {
+    "jacket", "coat", "hat", "shirt", "t-shirt", "blouse", "sweater", "hoodie", "cardigan", "vest",
+    "dress", "skirt", "pants", "trousers", "jeans", "shorts", "socks", "sock", "shoes", "shoe", "boots",
+    "boot", "sneakers", "sandals", "slippers", "heels", "gloves", "glove", "scarf", "belt", "robe",
+    "bathrobe", "gown", "cloak", "blazer", "suit", "uniform", "helmet", "apron", "bra", "underwear",
+    "pajamas",
+}
+# Names that already carry their own determiner ("your pajamas", "a wool scarf") are used as-is.
+DETERMINERS = {"the", "a", "an", "your", "my", "his", "her", "their", "its", "our", "some"}
+
+
+class AmbiguousNoun(Exception):
+    pass
+
+
+def parse_command(text):
+    text = " ".join(text.lower().split())
+    for verb, pattern in VERB_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            return verb, match.group(1).strip()
+    return None
+
+
+def the_name(item):
+    name = item['name']
+    return name if name.split(' ', 1)[0].lower() in DETERMINERS else f"the {name}"
+
+
+def is_wearable(item):
+    if 'wearable' in item:
+        return bool(item['wearable'])
+    words = re.findall(r"[a-z'-]+", " ".join([item.get('name', '')] + list(item.get('aliases', []))).lower())
+    return any(w in CLOTHING_WORDS for w in words)
+
+
+# Executes mechanical verbs straight against world state through apply_outcome. Returns the response
+# text, or None when the command is ambiguous or creative enough that the DM should handle it.
+def execute_command(world, verb, noun):
+    if set(noun.split()) & RELATION_WORDS:
+        return None
+    try:
+        return _execute(world, verb, noun)
+    except AmbiguousNoun:
+        return None
+
+
+def find_item(world, noun, scope):
+    # A noun that fits several items in scope equally well ("key" beside a brass and a rusty one) is the DM's call.
+    item = world.get_item_by_name(noun, scope=scope, unique=True)
+    if item is None and world.get_item_by_name(noun, scope=scope):
+        raise AmbiguousNoun(noun)
+    return item
+
+
+def _execute(world, verb, noun):
+
+    if verb == "take":
+        item = find_item(world, noun, ('room',))
+        if not item:
+            return "You already have that." if find_item(world, noun, ('inventory', 'worn')) else None
+        if not item.get('carryable', True):
+            return None
+        world.apply_outcome({"inventory_add": [item['id']], "room_remove": [item['id']]}, f"{verb} {noun}")
+        return "Taken."
+
+    if verb == "drop":
+        item = find_item(world, noun, ('inventory',))
+        if item:
+            world.apply_outcome({"inventory_remove": [item['id']]}, f"{verb} {noun}")
+            return "Dropped."
+        if find_item(world, noun, ('worn',)):
+            return "You'll have to take it off first."
+        return None
+
+    if verb == "wear":
+        if find_item(world, noun, ('worn',)):
+            return "You're already wearing that."
+        item = find_item(world, noun, ('inventory',))
+        if not item or not is_wearable(item):
+            return None
+        world.apply_outcome({"wear_add": [item['id']]}, f"{verb} {noun}")
+        return f"You put on {the_name(item)}."
+
+    if verb == "remove":
+        item = find_item(world, noun, ('worn',))
+        if not item:
+            return None
+        world.apply_outcome({"wear_remove": [item['id']]}, f"{verb} {noun}")
+        return f"You take off {the_name(item)}."
+
+    return None
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+
+from turn_memory import render_events
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+ROLE_BUDGETS = {
+    "DM": int(os.environ.get("DM_CONTEXT_TOKENS", "900")),
+    "ARCHITECT": int(os.environ.get("ARCHITECT_CONTEXT_TOKENS", "500")),
+    "REGION": int(os.environ.get("REGION_CONTEXT_TOKENS", "900")),
+}
+ROOM_DESCRIPTION_LIMIT = 600
+ITEM_DESCRIPTION_LIMIT = 240
+THREAD_LIMIT = 1200
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+STOP_WORDS = {"the", "a", "an", "some", "my", "your", "at", "on", "in", "to", "with", "of", "and", "from", "under", "into"}
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_prompt_tokens(system, user):
+    return estimate_tokens(system) + estimate_tokens(user) + 2 * MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate(text, limit):
+    if not text or len(text) <= limit:
+        return text or ""
+    cut = text[:limit].rsplit(' ', 1)[0]
+    return cut + "…"
+
+
+def tail(text, limit):
+    if not text or len(text) <= limit:
+        return text or ""
+    cut = text[-limit:].split(' ', 1)[-1]
+    return "…" + cut
+
+
+def compact_json(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+# Each context section is a list of renderings from richest to leanest. Sections start at their
+# richest rendering; while the total is over the role's budget, the lowest-priority section that can
+# still shrink steps down one rendering.
+class ContextBuilder:
+    def __init__(self, budgets=None):
+        self.budgets = dict(ROLE_BUDGETS if budgets is None else budgets)
+
+    def build_dm(self, world, user_input):
+        data = world.data
+        items = data['items']
+        player = data['player']
+        room = world.get_current_room()
+        words = self._words(user_input)
+
+        def item_views(ids, with_flags=False):
+            views = []
+            for iid in ids:
+                item = items.get(iid)
+                if not item:
+                    continue
+                view = {"id": iid, "name": item.get('name', 'thing')}
+                if with_flags and not item.get('visible', True):
+                    view["hidden"] = True
+                if with_flags and not item.get('carryable', True):
+                    view["fixed"] = True
+                views.append((view, item))
+            return views
+
+        def with_details(views, limit):
+            out = []
+            for view, item in views:
+                if limit and self._mentions(words, item):
+                    view = dict(view, desc=truncate(item.get('description', ''), limit))
+                out.append(view)
+            return out
+
+        room_items = item_views(room.get('items', []), with_flags=True)
+        inventory = item_views(player.get('inventory', []))
+        worn = item_views(player.get('worn', []))
+        base = room.get('base_description') or room.get('description') or ''
+        exits = sorted(room.get('exits', {}))
+
+        def room_view(desc_limit, item_limit):
+            view = {"id": room['id'], "name": room.get('name', 'Unknown'), "exits": exits}
+            if desc_limit and base:
+                view["desc"] = truncate(base, desc_limit)
+            view["items"] = with_details(room_items, item_limit)
+            return compact_json(view)
+
+        thread = data.get('narrative_thread', '')
+        player_desc = player.get('description') or ''
+        # Long-term memory: past turns ranked against this action and room, instead of a longer thread.
+        memories = world.memory.search(f"{user_input} {room.get('name', '')}")
+
+        sections = {
+            "room_json": (0, [
+                room_view(ROOM_DESCRIPTION_LIMIT, ITEM_DESCRIPTION_LIMIT),
+                room_view(ROOM_DESCRIPTION_LIMIT // 3, ITEM_DESCRIPTION_LIMIT // 2),
+                room_view(0, 0),
+            ]),
+            "inventory": (1, [
+                compact_json(with_details(inventory, ITEM_DESCRIPTION_LIMIT)),
+                compact_json(with_details(inventory, 0)),
+            ]),
+            "worn": (1, [
+                compact_json(with_details(worn, ITEM_DESCRIPTION_LIMIT)),
+                compact_json(with_details(worn, 0)),
+            ]),
+            "narrative_thread": (2, [
+                tail(thread, THREAD_LIMIT),
+                tail(thread, THREAD_LIMIT // 3),
+                "",
+            ]),
+            "memories": (2, [
+                render_events(memories),
+                render_events(memories[:len(memories) // 2]),
+                "",
+            ]),
+            "player_state": (3, [
+                compact_json({"desc": truncate(player_desc, ITEM_DESCRIPTION_LIMIT)} if player_desc else {}),
+                "{}",
+            ]),
+        }
+        return self._fit("DM", sections)
+
+    def build_architect(self, prev_room, direction, thread):
+        prev_name = prev_room['name'] if prev_room else "The Void"
+        prev_desc = prev_room['description'] if prev_room else "Nothingness."
+        sections = {
+            "direction": (0, [direction]),
+            "prev_name": (0, [prev_name]),
+            "prev_desc": (1, [
+                truncate(prev_desc, ROOM_DESCRIPTION_LIMIT),
+                truncate(prev_desc, ROOM_DESCRIPTION_LIMIT // 3),
+            ]),
+            "narrative_thread": (2, [
+                tail(thread, THREAD_LIMIT),
+                tail(thread, THREAD_LIMIT // 3),
+                "",
+            ]),
+        }
+        return self._fit("ARCHITECT", sections)
+
+    def build_region(self, stubs, thread):
+        def stub_views(desc_limit):
+            views = []
+            for stub_id, prev_room, direction in stubs:
+                view = {"stub_id": stub_id, "from": prev_room.get('name', 'Unknown'), "direction": direction}
+                if desc_limit:
+                    view["from_desc"] = truncate(prev_room.get('base_description') or prev_room.get('description'), desc_limit)
+                views.append(view)
+            return compact_json(views)
+
+        sections = {
+            "stubs": (0, [
+                stub_views(ROOM_DESCRIPTION_LIMIT // 3),
+                stub_views(ROOM_DESCRIPTION_LIMIT // 6),
+                stub_views(0),
+            ]),
+            "narrative_thread": (2, [
+                tail(thread, THREAD_LIMIT),
+                tail(thread, THREAD_LIMIT // 3),
+                "",
+            ]),
+        }
+        return self._fit("REGION", sections)
+
+    def _fit(self, role, sections):
+        budget = self.budgets.get(role)
+        level = dict.fromkeys(sections, 0)
+
+        def total():
+            return sum(estimate_tokens(variants[level[name]]) for name, (_, variants) in sections.items())
+
+        tokens = total()
+        if budget:
+            by_priority = sorted(sections, key=lambda name: sections[name][0], reverse=True)
+            while tokens > budget:
+                shrinkable = [n for n in by_priority if level[n] + 1 < len(sections[n][1])]
+                if not shrinkable:
+                    break
+                # Step the lowest-priority section down; ties go to whichever is currently largest.
+                lowest = sections[shrinkable[0]][0]
+                name = max((n for n in shrinkable if sections[n][0] == lowest),
+                           key=lambda n: len(sections[n][1][level[n]]))
+                level[name] += 1
+                tokens = total()
+
+        context = {name: variants[level[name]] for name, (_, variants) in sections.items()}
+        context["estimated_tokens"] = tokens
+        return context
+
+    def _words(self, text):
+        return {w for w in WORD_RE.findall(text.lower()) if w not in STOP_WORDS}
+
+    def _mentions(self, words, item):
+        names = [item.get('name', '')] + list(item.get('aliases', []))
+        return any(words & self._words(name) for name in names)
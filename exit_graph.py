@@ -0,0 +1,73 @@
+from collections import deque
+
+from item_index import phrase, tokenize
+
+
+def _add(exits, names, rid, room_exits, name, visited):
+    exits[rid] = dict(room_exits)
+    if visited:
+        names.setdefault(phrase(name or ''), set()).add(rid)
+
+
+# Adjacency index over room exits plus a name index of visited rooms, for multi-step travel. Built
+# from the rooms table's adjacency() the first time it is needed (column scans on SQLite, no record
+# per room), then kept in step by WorldManager: filling a stub updates its exits (and adds the new
+# stubs), and a first visit makes a room's name a travel target.
+class ExitGraph:
+    def __init__(self):
+        self.exits = None  # room id -> {direction: room id}; None until built
+        self.names = {}  # article-stripped room name -> visited room ids
+
+    def ensure(self, world):
+        if self.exits is not None:
+            return
+        rooms = world.data['rooms']
+        if hasattr(rooms, 'adjacency'):
+            rows = rooms.adjacency()
+        else:
+            rows = [(rid, room.get('exits', {}), room.get('name'), room.get('visited')) for rid, room in rooms.items()]
+        # Built aside and assigned only once complete, so a failed build is retried on the next travel.
+        exits, names = {}, {}
+        for row in rows:
+            _add(exits, names, *row)
+        self.exits, self.names = exits, names
+
+    def update_room(self, room):
+        if self.exits is not None:
+            _add(self.exits, self.names, room['id'], room.get('exits', {}), room.get('name'), room.get('visited'))
+
+    def find(self, query):
+        # Visited rooms called `query`: exact name first, else every room whose name has all its words.
+        key = phrase(query)
+        if not key:
+            return set()
+        if key in self.names:
+            return set(self.names[key])
+        words = set(tokenize(query))
+        return {rid for name, ids in self.names.items() if words <= set(name.split()) for rid in ids}
+
+    def path(self, start, goals):
+        # Shortest route from `start` to the nearest of `goals`, as [(direction, room id)]; None if unreachable.
+        if start in goals:
+            return []
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            rid = queue.popleft()
+            for direction, target in self.exits.get(rid, {}).items():
+                if target in previous:
+                    continue
+                previous[target] = (rid, direction)
+                if target in goals:
+                    steps = []
+                    while previous[target] is not None:
+                        rid, direction = previous[target]
+                        steps.append((direction, target))
+                        target = rid
+                    return steps[::-1]
+                queue.append(target)
+        return None
+
+    def clear(self):
+        self.exits = None
+        self.names = {}
@@ -0,0 +1,33 @@
+import os
+import time
+
+# WorldStore keeps hot worlds in process memory, so the app runs as one process and scales with
+# threads: a turn waiting on Mistral parks its thread on a socket read (GIL released) while the
+# other threads keep answering local commands. `gunicorn -c gunicorn.conf.py main:app`.
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("FROTZ_THREADS", "64"))
+# gthread workers heartbeat from the main loop, so this only catches a wedged process, not slow LLM calls.
+timeout = int(os.environ.get("FROTZ_WORKER_TIMEOUT", "120"))
+keepalive = 5
+
+
+def post_fork(_server, worker):
+    worker.boot_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    # Runs once main:app is imported. Worlds load on their first request, so this is the whole cold start.
+    from metrics import STARTUP_SECONDS
+
+    seconds = time.perf_counter() - worker.boot_started
+    STARTUP_SECONDS.observe(seconds, phase="import")
+    worker.log.info("Frotz worker %s ready in %.0f ms (app import)", worker.pid, seconds * 1000)
+
+
+def worker_exit(_server, worker):
+    # Graceful stop: write every hot world before the worker goes. main's atexit hook covers `python main.py`.
+    from main import store
+
+    worker.log.info("Frotz worker %s saved %d hot worlds", worker.pid, store.flush_all())
@@ -0,0 +1,123 @@
+import re
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+ARTICLES = {"the", "a", "an", "some", "my", "this", "that", "these", "those", "your"}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if t not in ARTICLES]
+
+
+def phrase(text):
+    return " ".join(tokenize(text))
+
+
+# Inverted index over item names and aliases. Postings cover the whole world, but resolution only
+# ever walks the intersection with the caller's scope (inventory, worn, room), so lookups stay cheap
+# however many items the world accumulates. Items are indexed when created or changed, and lazily
+# the first time they appear in a scope (covers items loaded from a save).
+class ItemIndex:
+    def __init__(self):
+        self.phrases = defaultdict(set)  # article-stripped name/alias -> item ids
+        self.tokens = defaultdict(set)  # single token -> item ids
+        self.entries = {}  # item id -> (phrases, tokens)
+
+    def add(self, item):
+        iid = item['id']
+        self.remove(iid)
+        names = [item.get('name', '')] + list(item.get('aliases', []))
+        phrases = {p for p in (phrase(n) for n in names) if p}
+        tokens = {t for n in names for t in tokenize(n)}
+        for p in phrases:
+            self.phrases[p].add(iid)
+        for t in tokens:
+            self.tokens[t].add(iid)
+        self.entries[iid] = (phrases, tokens)
+
+    def remove(self, iid):
+        entry = self.entries.pop(iid, None)
+        if not entry:
+            return
+        phrases, tokens = entry
+        for p in phrases:
+            self._discard(self.phrases, p, iid)
+        for t in tokens:
+            self._discard(self.tokens, t, iid)
+
+    def clear(self):
+        self.phrases.clear()
+        self.tokens.clear()
+        self.entries.clear()
+
+    def ensure(self, items, ids):
+        for iid in ids:
+            if iid not in self.entries and iid in items:
+                self.add(items[iid])
+
+    def resolve(self, query, scope):
+        # `scope` is an ordered list of candidate ids; earlier ids win ties.
+        matches = self._matches(query, scope)
+        return matches[0] if matches else None
+
+    def resolve_unique(self, query, scope):
+        # None unless exactly one item in scope fits as well as the best ("key" with a brass and a rusty one).
+        matches = self._matches(query, scope)
+        return matches[0] if len(matches) == 1 else None
+
+    def _matches(self, query, scope):
+        # The items tied for the best kind of match, best first: phrase/alias hits, then whole-word hits,
+        # then partial words, then substrings. Within a kind, closer name fit and scope order decide.
+        q_tokens = tokenize(query)
+        if not q_tokens:
+            return []
+        q_phrase = " ".join(q_tokens)
+        q_set = set(q_tokens)
+        rank = {iid: pos for pos, iid in enumerate(scope)}
+
+        candidates = self._postings_in(self.phrases.get(q_phrase), rank)
+        for t in q_set:
+            candidates |= self._postings_in(self.tokens.get(t), rank)
+
+        scored = []
+        for iid in candidates:
+            phrases, tokens = self.entries[iid]
+            exact = q_phrase in phrases
+            matched = len(q_set & tokens)
+            if not exact and matched < len(q_set):
+                # Every query word has to land on the item ("brass key" must not pick the rusty one).
+                continue
+            scored.append(((exact, matched / len(tokens) if tokens else 0.0, -rank[iid]), iid))
+        if scored:
+            scored.sort(reverse=True)
+            top = scored[0][0][0]
+            return [iid for score, iid in scored if score[0] == top]
+
+        return self._prefix_matches(q_tokens, scope) or self._substring_matches(q_phrase, scope)
+
+    def _prefix_matches(self, q_tokens, scope):
+        # Fallback for partial words ("mag" -> "magazine"), limited to the (small) scope.
+        matches = []
+        for iid in scope:
+            entry = self.entries.get(iid)
+            if entry and all(any(t.startswith(q) for t in entry[1]) for q in q_tokens):
+                matches.append(iid)
+        return matches
+
+    def _substring_matches(self, q_phrase, scope):
+        # Last resort, as the old linear scan did: the query anywhere in a name or alias ("phone" -> "cellphone").
+        return [iid for iid in scope if iid in self.entries and any(q_phrase in p for p in self.entries[iid][0])]
+
+    def _postings_in(self, postings, rank):
+        if not postings:
+            return set()
+        if len(postings) <= len(rank):
+            return {iid for iid in postings if iid in rank}
+        return {iid for iid in rank if iid in postings}
+
+    def _discard(self, table, key, iid):
+        ids = table.get(key)
+        if ids is not None:
+            ids.discard(iid)
+            if not ids:
+                del table[key]
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+
+JOURNAL_SUFFIX = ".journal"
+COMPACTING_SUFFIX = ".journal.compacting"
+COMPACT_EVERY = int(os.environ.get("FROTZ_JOURNAL_COMPACT_EVERY", "200"))
+FSYNC_JOURNAL = os.environ.get("FROTZ_JOURNAL_FSYNC", "0") == "1"
+
+# Top-level save keys whose values are id -> record tables; deltas merge into these per record.
+RECORD_TABLES = ("rooms", "items", "characters")
+
+
+def apply_delta(data, delta):
+    for key, value in delta.items():
+        if key in RECORD_TABLES:
+            data.setdefault(key, {}).update(value)
+        else:
+            data[key] = value
+
+
+# Snapshot + append-only JSONL delta log. Compaction renames the log aside and folds it into
+# the snapshot on a background thread, so a crash at any point leaves files `load` can replay.
+class WorldJournal:
+    def __init__(self, snapshot_file, compact_every=COMPACT_EVERY, fsync=FSYNC_JOURNAL):
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file + JOURNAL_SUFFIX
+        self.compacting_file = snapshot_file + COMPACTING_SUFFIX
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.entries = 0
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def load(self):
+        data = self._read_snapshot()
+        if data is None:
+            return None
+
+        for path in (self.compacting_file, self.journal_file):
+            self._trim_torn_tail(path)
+        for delta in self._read_deltas(self.compacting_file):
+            apply_delta(data, delta)
+        self.entries = 0
+        for delta in self._read_deltas(self.journal_file):
+            apply_delta(data, delta)
+            self.entries += 1
+
+        if os.path.exists(self.compacting_file) or self.entries >= self.compact_every:
+            self.compact()
+        return data
+
+    def append(self, delta):
+        line = json.dumps(delta, separators=(',', ':'))
+        with self._lock:
+            self._ensure_dir()
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.entries += 1
+            due = self.entries >= self.compact_every
+        if due:
+            self.compact()
+
+    def write_snapshot(self, data):
+        self._join_compactor()
+        with self._lock:
+            self._ensure_dir()
+            self._write_snapshot_file(json.dumps(data, indent=2))
+            for path in (self.journal_file, self.compacting_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.entries = 0
+
+    def compact(self, wait=False):
+        if wait:
+            self._join_compactor()
+
+        with self._lock:
+            if self._compactor and self._compactor.is_alive():
+                return False
+            if not os.path.exists(self.journal_file) and not os.path.exists(self.compacting_file):
+                return False
+            self._rotate()
+            self.entries = 0
+            self._compactor = threading.Thread(target=self._fold, name="journal-compactor", daemon=True)
+            self._compactor.start()
+
+        if wait:
+            self._join_compactor()
+        return True
+
+    def _rotate(self):
+        if not os.path.exists(self.journal_file):
+            return
+        if not os.path.exists(self.compacting_file):
+            os.replace(self.journal_file, self.compacting_file)
+            return
+        # A previous fold never finished; keep its records ahead of the newer ones.
+        with open(self.journal_file, 'r', encoding='utf-8') as src, \
+                open(self.compacting_file, 'a', encoding='utf-8') as dst:
+            dst.write(src.read())
+        os.remove(self.journal_file)
+
+    def _fold(self):
+        try:
+            data = self._read_snapshot()
+            if data is None:
+                return
+            for delta in self._read_deltas(self.compacting_file):
+                apply_delta(data, delta)
+            self._write_snapshot_file(json.dumps(data, indent=2))
+            os.remove(self.compacting_file)
+        except Exception:
+            # Leave the compacting log in place; the next load replays it.
+            pass
+
+    def close(self):
+        # No handle is kept open between writes; only a running fold needs to finish.
+        self._join_compactor()
+
+    def _join_compactor(self):
+        compactor = self._compactor
+        if compactor and compactor.is_alive():
+            compactor.join()
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.snapshot_file):
+            return None
+        with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _read_deltas(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A torn final write from a crash; everything before it is intact.
+                    continue
+
+    def _trim_torn_tail(self, path):
+        # Cut a partial last line left by a crash, so the next append starts on a line of its own.
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            text = f.read()
+            if text and not text.endswith(b"\n"):
+                f.truncate(text.rfind(b"\n") + 1)
+
+    def _write_snapshot_file(self, text):
+        tmp = self.snapshot_file + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_file)
+
+    def _ensure_dir(self):
+        save_dir = os.path.dirname(self.snapshot_file)
+        if save_dir and not os.path.exists(save_dir):
+            os.makedirs(save_dir)
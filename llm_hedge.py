@@ -0,0 +1,149 @@
+import contextlib
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from llm_transport import Cancellation
+from metrics import LLM_DEADLINE_MISSES, LLM_HEDGE_WINS, LLM_HEDGES
+
+# Seconds a caller waits for a role before giving up with a fallback (0 = no deadline).
+ROLE_DEADLINES = {
+    "GENESIS": float(os.environ.get("LLM_DEADLINE_GENESIS", "120")),
+    "ARCHITECT": float(os.environ.get("LLM_DEADLINE_ARCHITECT", "60")),
+    "REGION": float(os.environ.get("LLM_DEADLINE_REGION", "90")),
+    "DM": float(os.environ.get("LLM_DEADLINE_DM", "30")),
+}
+# A duplicate request is fired once the first has run longer than this percentile of recent latency.
+HEDGE_ROLES = {r for r in os.environ.get("LLM_HEDGE_ROLES", "DM").upper().split(",") if r}
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", "1.0"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Attempt threads per role, so a backlog of slow GENESIS/REGION calls can't hold up DM turns.
+HEDGE_WORKERS = int(os.environ.get("LLM_HEDGE_WORKERS", "64"))
+LATENCY_WINDOW = 200
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def percentile(self, key, pct, min_samples=1):
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100.0))]
+
+
+# Runs one logical LLM call as one or two attempts. `attempt(cancel)` performs a request and returns
+# its result; `cancel` is a per-attempt Cancellation carrying the call's deadline, so the transport
+# never waits past it. The first attempt to succeed wins, the other is cancelled (closing its
+# connection if one is open; a result that still lands is handed to `discard`). Past the role
+# deadline the call raises DeadlineExceeded.
+class Hedger:
+    def __init__(self, deadlines=None, hedge_roles=None, percentile=HEDGE_PERCENTILE,
+                 min_delay=HEDGE_MIN_DELAY, min_samples=HEDGE_MIN_SAMPLES, max_workers=HEDGE_WORKERS):
+        self.deadlines = dict(ROLE_DEADLINES if deadlines is None else deadlines)
+        self.hedge_roles = set(HEDGE_ROLES if hedge_roles is None else hedge_roles)
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.latency = LatencyTracker()
+        self._executors = {}  # role -> ThreadPoolExecutor
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, role, key):
+        if role not in self.hedge_roles:
+            return None
+        delay = self.latency.percentile(key, self.percentile, self.min_samples)
+        return None if delay is None else max(self.min_delay, delay)
+
+    def run(self, role, attempt, discard=None, key=None):
+        key = key or role
+        deadline = self.deadlines.get(role) or None
+        delay = self.hedge_delay(role, key)
+
+        if delay is None and deadline is None:
+            started = time.monotonic()
+            result = attempt(Cancellation())
+            self.latency.observe(key, time.monotonic() - started)
+            return result
+
+        started = time.monotonic()
+        expires = started + deadline if deadline else None
+        attempts = [self._launch(role, attempt, expires)]
+        first = attempts[0][0]
+        hedged = False
+        failure = None
+        try:
+            while True:
+                elapsed = time.monotonic() - started
+                waits = [deadline - elapsed] if deadline else []
+                if delay is not None and not hedged:
+                    waits.append(delay - elapsed)
+                running = [future for future, _, _ in attempts]
+                done, _ = wait(running, timeout=max(0.0, min(waits)) if waits else None,
+                               return_when=FIRST_COMPLETED)
+
+                for future, cancel, attempt_started in list(attempts):
+                    if future not in done:
+                        continue
+                    if future.exception() is None:
+                        self.latency.observe(key, time.monotonic() - attempt_started)
+                        if hedged and future is not first:
+                            LLM_HEDGE_WINS.inc(role=role)
+                        attempts.remove((future, cancel, attempt_started))
+                        return future.result()
+                    failure = future.exception()
+                    attempts.remove((future, cancel, attempt_started))
+
+                if not attempts:
+                    # Every attempt failed (each already retried in the transport).
+                    raise failure
+
+                elapsed = time.monotonic() - started
+                if deadline and elapsed >= deadline:
+                    LLM_DEADLINE_MISSES.inc(role=role)
+                    raise DeadlineExceeded(f"{role} call exceeded its {deadline:g}s deadline")
+                if delay is not None and not hedged and elapsed >= delay:
+                    hedged = True
+                    LLM_HEDGES.inc(role=role)
+                    attempts.append(self._launch(role, attempt, expires))
+        finally:
+            for future, cancel, _ in attempts:
+                self._abandon(future, cancel, discard)
+
+    def _launch(self, role, attempt, expires):
+        cancel = Cancellation(expires)
+        return self._executor(role).submit(attempt, cancel), cancel, time.monotonic()
+
+    def _executor(self, role):
+        with self._lock:
+            executor = self._executors.get(role)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"llm-{role.lower()}")
+                self._executors[role] = executor
+            return executor
+
+    def _abandon(self, future, cancel, discard):
+        cancel.set()
+        if future.cancel() or discard is None:
+            return
+
+        def cleanup(f):
+            if not f.cancelled() and f.exception() is None:
+                with contextlib.suppress(Exception):
+                    discard(f.result())
+        future.add_done_callback(cleanup)
@@ -1,14 +1,26 @@
-import datetime
+import itertools
 import json
 import os
+import time
 
-import requests
+from context_builder import ContextBuilder, estimate_prompt_tokens
+from llm_hedge import DeadlineExceeded, Hedger
+from llm_transport import LLMTransport
+from metrics import LLM_RETRIES, observe_llm_call, observe_llm_discard
+from model_router import ModelRouter
+from narrative_stream import NarrativeStream
+from prompt_compiler import PromptCompiler
+from telemetry import TelemetrySink
 
 MISTRAL_API_KEY = os.environ.get("MISTRAL_API_KEY")
-API_URL = "https://api.mistral.ai/v1/chat/completions"
-DEBUG_LOG_FILE = "debug_log.txt"
 LORE_FILE = "lore.txt"
 
+# In-character answers when a call runs past its deadline (see llm_hedge.ROLE_DEADLINES).
+DEADLINE_FALLBACKS = {
+    "DM": "Time seems to hitch for a moment, as if the world lost its train of thought. Nothing you did quite took hold; try that again.",
+}
+DEFAULT_FALLBACK = "The world holds its breath and nothing happens, for now."
+
 # --- THE GENESIS: CREATING THE WORLD START ---
 PROMPT_GENESIS = """
 You are the 'Great Creator' for a high-fidelity Interactive Fiction (IF) engine. 
@@ -63,12 +75,6 @@ GENERAL RULES:
 3. SENSORY LOGIC: Focus on visuals, sounds, and smells. Objects should feel heavy, old, or significant.
 4. ALIASES: Generate 2-4 synonyms for every item (e.g. for 'rusty key', add ['key', 'rusty', 'iron key']).
 
-CONTEXT:
-- Lore Bible: {lore_bible}
-- Current Narrative Thread: {narrative_thread}
-- Previous Location: {prev_name} ({prev_desc})
-- Movement Direction: {direction}
-
 OUTPUT VALID JSON ONLY:
 {{
   "name": "New Room Title",
@@ -84,6 +90,59 @@ OUTPUT VALID JSON ONLY:
     }}
   ]
 }}
+
+LORE BIBLE:
+{lore_bible}
+"""
+
+CONTEXT_ARCHITECT = """
+CONTEXT:
+- Current Narrative Thread: {narrative_thread}
+- Previous Location: {prev_name} ({prev_desc})
+- Movement Direction: {direction}
+"""
+
+# --- THE REGIONAL ARCHITECT: SEVERAL STUBS PER CALL ---
+PROMPT_REGION = """
+You are the 'Regional Architect' for an Interactive Fiction engine.
+Your purpose is to procedurally expand the world ahead of the player by designing several unexplored areas at once.
+
+GENERAL RULES:
+1. STYLE: Second-person ("You"). Moody, atmospheric, and classic.
+2. COHESION: Use the 'Lore Bible' and 'Narrative Thread' so every area fits the overarching story. Areas reached from the same place are neighbours: make them feel like parts of one connected region, without repeating each other.
+3. SENSORY LOGIC: Focus on visuals, sounds, and smells. Objects should feel heavy, old, or significant.
+4. ALIASES: Generate 2-4 synonyms for every item (e.g. for 'rusty key', add ['key', 'rusty', 'iron key']).
+5. COVERAGE: Return exactly one room for every stub listed in the context, copying its 'stub_id'. Do not list the way back (the opposite of the stub's direction) in 'new_exits'.
+
+OUTPUT VALID JSON ONLY:
+{{
+  "rooms": [
+    {{
+      "stub_id": "room_xxxxxxxx",
+      "name": "New Room Title",
+      "description": "Sensory-rich description of this new area.",
+      "new_exits": ["south", "west"],
+      "items": [
+        {{
+          "id": "unique_item_id",
+          "name": "short name",
+          "aliases": ["synonym1", "synonym2", "noun"],
+          "description": "Full examine text.",
+          "is_carryable": true
+        }}
+      ]
+    }}
+  ]
+}}
+
+LORE BIBLE:
+{lore_bible}
+"""
+
+CONTEXT_REGION = """
+CONTEXT:
+- Current Narrative Thread: {narrative_thread}
+- Stubs To Fill (where each is entered from, and in which direction): {stubs}
 """
 
 # --- THE DM: ACTION & NARRATION ---
@@ -91,14 +150,6 @@ PROMPT_DM = """
 You are the 'Dungeon Master' (DM) for a classic Interactive Fiction game.
 You interpret user inputs and narrate the results based on the world state and lore.
 
-YOUR CONTEXT:
-- Lore Bible: {lore_bible}
-- Narrative Thread: {narrative_thread}
-- Current Room State: {room_json}
-- Player Inventory: {inventory}
-- Player Worn Items: {worn}
-- Player State: {player_state}
-
 YOUR INSTRUCTIONS:
 1. PARSING: Interpret intent (n, s, e, w, x, i, l, or complex actions like 'search the desk').
 2. NARRATION:
@@ -135,98 +186,289 @@ OUTPUT VALID JSON ONLY:
   "item_visibility_update": {{ "item_id": true }},
   "narrative_summary_update": "Brief update on plot/world state."
 }}
+
+LORE BIBLE:
+{lore_bible}
+"""
+
+CONTEXT_DM = """
+YOUR CONTEXT:
+- Narrative Thread: {narrative_thread}
+- Relevant Past Events: {memories}
+- Current Room State: {room_json}
+- Player Inventory: {inventory}
+- Player Worn Items: {worn}
+- Player State: {player_state}
 """
 
 
+def validate_region(data, stub_ids):
+    if not isinstance(data, dict) or data.get('error'):
+        return {}
+    rooms = data.get('rooms')
+    if isinstance(rooms, dict):
+        rooms = [dict(room, stub_id=sid) for sid, room in rooms.items() if isinstance(room, dict)]
+    if not isinstance(rooms, list):
+        return {}
+
+    wanted = set(stub_ids)
+    out = {}
+    for room in rooms:
+        if not isinstance(room, dict):
+            continue
+        sid = room.get('stub_id')
+        if sid not in wanted or sid in out:
+            continue
+        if not isinstance(room.get('name'), str) or not isinstance(room.get('description'), str) \
+                or not room['description'].strip():
+            continue
+        exits = room.get('new_exits')
+        items = room.get('items')
+        out[sid] = {
+            "name": room['name'],
+            "description": room['description'],
+            "new_exits": [d for d in exits if isinstance(d, str)] if isinstance(exits, list) else [],
+            "items": [i for i in items if isinstance(i, dict)] if isinstance(items, list) else [],
+        }
+    return out
+
+
 class LLMInterface:
-    def __init__(self):
-        self.model = "mistral-large-latest"
+    def __init__(self, transport=None, telemetry=None, hedger=None, router=None):
+        self.router = router or ModelRouter()
+        self.model = self.router.models["large"]
+        self.transport = transport or LLMTransport(api_key=MISTRAL_API_KEY)
+        self.telemetry = telemetry or TelemetrySink()
+        self.hedger = hedger or Hedger()
+        self.prompts = PromptCompiler(LORE_FILE)
+        self.prompts.register("GENESIS", PROMPT_GENESIS)
+        self.prompts.register("ARCHITECT", PROMPT_ARCHITECT, CONTEXT_ARCHITECT)
+        self.prompts.register("REGION", PROMPT_REGION, CONTEXT_REGION)
+        self.prompts.register("DM", PROMPT_DM, CONTEXT_DM)
+        self.context = ContextBuilder()
 
     def get_lore(self):
-        if os.path.exists(LORE_FILE):
-            with open(LORE_FILE, 'r', encoding='utf-8') as f:
-                return f.read()
-        return "A mysterious text adventure."
+        return self.prompts.lore()
 
-    def _extract_usage(self, response_json):
+    def _extract_usage(self, response_json, estimated_input=None):
         usage = response_json.get('usage', {}) if isinstance(response_json, dict) else {}
         return {
+            "estimated_input_tokens": estimated_input,
             "input_tokens": usage.get('prompt_tokens'),
             "output_tokens": usage.get('completion_tokens'),
             "total_tokens": usage.get('total_tokens'),
             "raw_usage": usage
         }
 
-    def _write_debug_log(self, role, system_tag, user_tag, output_data, usage_info):
-        with open(DEBUG_LOG_FILE, "a", encoding='utf-8') as f:
-            ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(
-                f"--- {ts} [{role}] ---\n"
-                f"[SYSTEM]: {system_tag}\n"
-                f"[USER]: {user_tag}\n"
-                f"[USAGE]: input={usage_info.get('input_tokens')} output={usage_info.get('output_tokens')} total={usage_info.get('total_tokens')} raw={json.dumps(usage_info.get('raw_usage', {}))}\n"
-                f"[OUTPUT]: {json.dumps(output_data, indent=2)}\n\n"
-            )
-
-    def _req(self, system, user, role, system_tag, user_tag):
-        if not MISTRAL_API_KEY:
-            return {"error": "API Key Missing", "narrative": "Set your MISTRAL_API_KEY in Replit Secrets."}
+    def _record(self, role, model, system, user, started, content, usage_info, error=None, streamed=False, shared=0):
+        elapsed = time.perf_counter() - started
+        observe_llm_call(role, model, elapsed, usage_info, error)
+        record = {
+            "role": role,
+            "model": model,
+            "streamed": streamed,
+            "latency_ms": round(elapsed * 1000, 1),
+            "estimated_input_tokens": estimate_prompt_tokens(system, user),
+            "input_tokens": usage_info.get('input_tokens'),
+            "output_tokens": usage_info.get('output_tokens'),
+            "total_tokens": usage_info.get('total_tokens'),
+            "prompt_bytes": len(system.encode('utf-8')) + len(user.encode('utf-8')),
+            "shared_prefix_bytes": shared,
+            "outcome_bytes": len(content.encode('utf-8')) if content else 0,
+            "error": error,
+        }
+        capture = None
+        if self.telemetry.wants_capture(role):
+            capture = {"system": system, "user": user, "output": content}
+        self.telemetry.emit(record, capture)
+
+    def _record_discard(self, role, model, system, user, usage_info, streamed=False):
+        observe_llm_discard(role, model, usage_info)
+        self.telemetry.emit({
+            "role": role,
+            "model": model,
+            "streamed": streamed,
+            "discarded": True,
+            "estimated_input_tokens": usage_info.get('estimated_input_tokens'),
+            "input_tokens": usage_info.get('input_tokens'),
+            "output_tokens": usage_info.get('output_tokens'),
+            "total_tokens": usage_info.get('total_tokens'),
+            "prompt_bytes": len(system.encode('utf-8')) + len(user.encode('utf-8')),
+        })
 
-        headers = {"Authorization": f"Bearer {MISTRAL_API_KEY}", "Content-Type": "application/json"}
-        payload = {
-            "model": self.model,
+    def _payload(self, system, user, model):
+        return {
+            "model": model,
             "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
             "response_format": {"type": "json_object"},
             "temperature": 0.7
         }
 
+    def _req(self, system, user, role, model=None, shared=0):
+        model = model or self.model
+        if not MISTRAL_API_KEY:
+            return {"error": "API Key Missing", "narrative": "Set your MISTRAL_API_KEY in Replit Secrets."}
+
+        payload = self._payload(system, user, model)
+        started = time.perf_counter()
+        content = None
+
+        def attempt(cancel):
+            return self.transport.post_json(payload, on_retry=lambda: LLM_RETRIES.inc(role=role), cancel=cancel)
+
+        def discard(response_json):
+            # A losing hedge attempt that still completed: its tokens are spent either way.
+            usage_info = self._extract_usage(response_json, estimate_prompt_tokens(system, user))
+            self._record_discard(role, model, system, user, usage_info)
+
         try:
-            resp = requests.post(API_URL, headers=headers, json=payload)
-            resp.raise_for_status()
-            response_json = resp.json()
-            data = json.loads(response_json['choices'][0]['message']['content'])
-            usage_info = self._extract_usage(response_json)
+            response_json = self.hedger.run(role, attempt, discard=discard, key=f"{role}:{model}")
+            content = response_json['choices'][0]['message']['content']
+            data = json.loads(content)
+            usage_info = self._extract_usage(response_json, estimate_prompt_tokens(system, user))
             data["_usage"] = usage_info
-            self._write_debug_log(role, system_tag, user_tag, data, usage_info)
+            self._record(role, model, system, user, started, content, usage_info, shared=shared)
             return data
+        except DeadlineExceeded as e:
+            self._record(role, model, system, user, started, content, {}, error=repr(e), shared=shared)
+            return self._deadline_fallback(role)
         except Exception as e:
+            self._record(role, model, system, user, started, content, {}, error=repr(e), shared=shared)
             return {"narrative": f"The logic of the world ripples... (Error: {e})", "error": True}
 
+    def _stream_req(self, system, user, role, model=None, shared=0):
+        # Yields ("narrative", text) pieces as they arrive, then exactly one ("outcome", data).
+        if not MISTRAL_API_KEY:
+            yield "outcome", {"error": "API Key Missing", "narrative": "Set your MISTRAL_API_KEY in Replit Secrets."}
+            return
+
+        model = model or self.model
+        payload = self._payload(system, user, model)
+        payload["stream"] = True
+
+        def attempt(cancel):
+            # Hedging and deadlines apply to the wait for the first event; after that the stream is ours.
+            events = self.transport.stream_json(payload, on_retry=lambda: LLM_RETRIES.inc(role=role), cancel=cancel)
+            return next(events, None), events
+
+        def discard(opened):
+            # The losing stream is closed after its first event; usage only arrives at the end, so
+            # bill the prompt the provider has already read.
+            opened[1].close()
+            estimated = estimate_prompt_tokens(system, user)
+            usage_info = {"estimated_input_tokens": estimated, "input_tokens": estimated}
+            self._record_discard(role, model, system, user, usage_info, streamed=True)
+
+        narrative = NarrativeStream()
+        content = []
+        usage_event = {}
+        started = time.perf_counter()
+        try:
+            try:
+                first, events = self.hedger.run(role, attempt, discard=discard, key=f"{role}:{model}:first_event")
+            except DeadlineExceeded as e:
+                self._record(role, model, system, user, started, "", {}, error=repr(e), streamed=True, shared=shared)
+                yield "outcome", self._deadline_fallback(role)
+                return
+            for event in itertools.chain([first] if first else [], events):
+                if event.get('usage'):
+                    usage_event = event
+                for choice in event.get('choices', []):
+                    piece = (choice.get('delta') or {}).get('content') or ''
+                    if not piece:
+                        continue
+                    content.append(piece)
+                    text = narrative.feed(piece)
+                    if text:
+                        yield "narrative", text
+            data = json.loads("".join(content))
+            usage_info = self._extract_usage(usage_event, estimate_prompt_tokens(system, user))
+            data["_usage"] = usage_info
+            self._record(role, model, system, user, started, "".join(content), usage_info, streamed=True, shared=shared)
+        except Exception as e:
+            self._record(role, model, system, user, started, "".join(content), {}, error=repr(e), streamed=True, shared=shared)
+            data = {"narrative": f"The logic of the world ripples... (Error: {e})", "error": True}
+        yield "outcome", data
+
+    def _deadline_fallback(self, role):
+        return {"narrative": DEADLINE_FALLBACKS.get(role, DEFAULT_FALLBACK), "error": True, "deadline": True}
+
     def generate_genesis(self):
-        lore = self.get_lore()
-        sys = PROMPT_GENESIS.format(lore_bible=lore)
-        user = "Initiate World Genesis."
-        return self._req(
-            sys,
-            user,
-            "GENESIS",
-            "[GENESIS SYSTEM PROMPT]",
-            "Initiate World Genesis. [LORE BIBLE CONTENTS]"
-        )
+        sys, shared = self.prompts.compile("GENESIS")
+        return self._routed_req(sys, "Initiate World Genesis.", "GENESIS", shared=shared)
 
     def generate_room(self, prev_room, direction, thread):
-        lore = self.get_lore()
-        p_name = prev_room['name'] if prev_room else "The Void"
-        p_desc = prev_room['description'] if prev_room else "Nothingness."
-        sys = PROMPT_ARCHITECT.format(lore_bible=lore, narrative_thread=thread, prev_name=p_name, prev_desc=p_desc, direction=direction)
-        return self._req(sys, "The player has moved. Describe the new area.", "ARCHITECT")
-
-    def process_turn(self, user_input, room_data, inventory, worn, player_state, thread):
-        lore = self.get_lore()
-        sys = PROMPT_DM.format(
-            lore_bible=lore,
-            narrative_thread=thread,
-            room_json=json.dumps(room_data),
-            inventory=json.dumps(inventory),
-            worn=json.dumps(worn),
-            player_state=json.dumps(player_state)
+        context = self.context.build_architect(prev_room, direction, thread)
+        sys, shared = self.prompts.compile(
+            "ARCHITECT",
+            narrative_thread=context['narrative_thread'],
+            prev_name=context['prev_name'],
+            prev_desc=context['prev_desc'],
+            direction=context['direction']
+        )
+        return self._routed_req(sys, "The player has moved. Describe the new area.", "ARCHITECT", shared=shared)
+
+    def generate_region(self, stubs, thread):
+        # `stubs` is [(stub id, room it is entered from, direction)]; returns {stub id: room data}
+        # holding only the rooms that came back well-formed (empty on failure).
+        context = self.context.build_region(stubs, thread)
+        sys, shared = self.prompts.compile(
+            "REGION",
+            narrative_thread=context['narrative_thread'],
+            stubs=context['stubs']
         )
-        user = f"PLAYER ACTION: {user_input}"
-        return self._req(
-            sys,
-            user,
+        data = self._routed_req(sys, "The player is approaching these areas. Describe each of them.", "REGION",
+                                shared=shared)
+        return validate_region(data, [stub_id for stub_id, _, _ in stubs])
+
+    def process_turn(self, user_input, context):
+        system, user, role, shared = self._dm_request(user_input, context)
+        return self._routed_req(system, user, role, user_input, shared)
+
+    def stream_turn(self, user_input, context):
+        system, user, role, shared = self._dm_request(user_input, context)
+        route = self.router.route(role, user_input)
+        started = time.perf_counter()
+        outcome, narrated = yield from self._relay(system, user, role, route.model, shared)
+        # Narrative already on screen can't be taken back, so a stream only escalates a failure that showed nothing.
+        reason = None if narrated else self.router.escalation(route, outcome, streamed=True)
+        if reason:
+            route = self.router.escalate(role, reason)
+            outcome, _ = yield from self._relay(system, user, role, route.model, shared)
+        self.router.observe(role, route, time.perf_counter() - started)
+        yield "outcome", outcome
+
+    def _relay(self, system, user, role, model, shared):
+        # Passes narrative pieces through and returns (outcome, whether any narrative was shown).
+        outcome, narrated = None, False
+        for kind, value in self._stream_req(system, user, role, model, shared):
+            if kind == "narrative":
+                narrated = True
+                yield kind, value
+            else:
+                outcome = value
+        return outcome, narrated
+
+    def _routed_req(self, system, user, role, user_input=None, shared=0):
+        route = self.router.route(role, user_input)
+        started = time.perf_counter()
+        data = self._req(system, user, role, route.model, shared)
+        reason = self.router.escalation(route, data)
+        if reason:
+            route = self.router.escalate(role, reason)
+            data = self._req(system, user, role, route.model, shared)
+        self.router.observe(role, route, time.perf_counter() - started)
+        return data
+
+    def _dm_request(self, user_input, context):
+        # `context` comes from ContextBuilder.build_dm: pre-serialized, budgeted sections.
+        sys, shared = self.prompts.compile(
             "DM",
-            "[DM SYSTEM PROMPT]",
-            f"PLAYER ACTION: {user_input} [LORE BIBLE CONTENTS] [NARRATIVE THREAD] [CURRENT ROOM STATE] [INVENTORY] [WORN ITEMS] [PLAYER STATE]"
+            narrative_thread=context['narrative_thread'],
+            memories=context['memories'] or "(none)",
+            room_json=context['room_json'],
+            inventory=context['inventory'],
+            worn=context['worn'],
+            player_state=context['player_state']
         )
-        return self._req(sys, f"PLAYER ACTION: {user_input}", "DM")
+        return sys, f"PLAYER ACTION: {user_input}", "DM", shared
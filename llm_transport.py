@@ -0,0 +1,169 @@
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = os.environ.get("MISTRAL_API_URL", "https://api.mistral.ai/v1/chat/completions")
+CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("LLM_READ_TIMEOUT", "90"))
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "64"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_AFTER_CAP = 30.0
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+# Cancel signal for one attempt, with an optional absolute deadline (time.monotonic()). The transport
+# caps every timeout at the time left and registers the response it is reading, so set() also
+# closes that connection instead of leaving it to run out READ_TIMEOUT.
+class Cancellation:
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._resp = None
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def remaining(self):
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def set(self):
+        with self._lock:
+            self._event.set()
+            resp, self._resp = self._resp, None
+        if resp is not None:
+            resp.close()
+
+    def attach(self, resp):
+        with self._lock:
+            if not self._event.is_set():
+                self._resp = resp
+                return
+        resp.close()
+        raise RequestCancelled()
+
+    def detach(self, resp):
+        with self._lock:
+            if self._resp is resp:
+                self._resp = None
+
+
+class LLMTransport:
+    def __init__(self, api_url=API_URL, api_key=None, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, max_retries=MAX_RETRIES, pool_size=POOL_SIZE):
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retries = 0
+
+        # One keep-alive pool per process: every GENESIS/ARCHITECT/DM call reuses warm TLS connections.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def post_json(self, payload, on_retry=None, cancel=None):
+        # Sent as a stream so the body read can be cut off by `cancel` too.
+        resp = self._send(payload, on_retry=on_retry, cancel=cancel)
+        try:
+            return resp.json()
+        finally:
+            if cancel is not None:
+                cancel.detach(resp)
+            resp.close()
+
+    def stream_json(self, payload, on_retry=None, cancel=None):
+        # Server-sent events from a `"stream": true` request; retries only happen before the first byte.
+        # Closing the generator closes the connection.
+        resp = self._send(payload, on_retry=on_retry, cancel=cancel)
+        with resp:
+            for raw in resp.iter_lines():
+                line = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+                if not line.startswith("data:"):
+                    continue
+                body = line[5:].strip()
+                if body == "[DONE]":
+                    break
+                if body:
+                    yield json.loads(body)
+
+    def _send(self, payload, on_retry=None, cancel=None):
+        # `cancel` (Cancellation) is set when a hedged duplicate has already won or the caller gave up:
+        # stop retrying. Its deadline bounds every connect/read timeout and the waits between retries.
+        attempt = 0
+        while True:
+            timeout = self._timeout(cancel)
+            try:
+                resp = self.session.post(self.api_url, json=payload, timeout=timeout, stream=True)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if not resp.ok:
+                        resp.close()
+                    resp.raise_for_status()
+                    if cancel is not None:
+                        cancel.attach(resp)
+                    return resp
+                delay = self._retry_after(resp)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                resp.close()
+
+            attempt += 1
+            self.retries += 1
+            if on_retry:
+                on_retry()
+            if cancel is not None:
+                remaining = cancel.remaining()
+                cancel.wait(delay if remaining is None else max(0.0, min(delay, remaining)))
+            else:
+                time.sleep(delay)
+
+    def _timeout(self, cancel):
+        if cancel is None:
+            return self.timeout
+        remaining = cancel.remaining()
+        if cancel.is_set() or (remaining is not None and remaining <= 0):
+            raise RequestCancelled()
+        if remaining is None:
+            return self.timeout
+        return min(self.timeout[0], remaining), min(self.timeout[1], remaining)
+
+    def _backoff(self, attempt):
+        # "Full jitter": spreads retries from many workers instead of having them stampede together.
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    def _retry_after(self, resp):
+        value = resp.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                when = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            delay = when.timestamp() - time.time()
+        return min(RETRY_AFTER_CAP, max(0.0, delay))
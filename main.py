@@ -1,10 +1,44 @@
-from flask import Flask, render_template, request, jsonify
-from world_manager import WorldManager
+import atexit
+import json
+
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+from command_parser import execute_command, parse_command
+from world_store import SESSION_COOKIE, WorldStore
 from llm_interface import LLMInterface
+from metrics import REGISTRY
+from room_prefetcher import RoomPrefetcher
+from turn_slots import BUSY_RETRY_AFTER, SlotsExhausted, TurnSlots
+from world_actor import QueueFull, TurnAbandoned
+
+SESSION_MAX_AGE = 60 * 60 * 24 * 365
 
 app = Flask(__name__)
-world = WorldManager()
 ai = LLMInterface()
+prefetcher = RoomPrefetcher(ai)
+store = WorldStore(busy=prefetcher.pending)
+atexit.register(store.flush_all)
+turn_slots = TurnSlots()
+BUSY_TEXT = "The world is crowded with other stories right now. Give it a moment and try again."
+QUEUE_FULL_TEXT = "You are already doing several things at once. Wait for the world to catch up."
+
+
+def current_world():
+    # The HUD state version the client last applied; responses then carry only what changed since.
+    known = (request.get_json(silent=True) or {}).get('state_version')
+    g.state_version = known if isinstance(known, str) else None
+    sid = request.cookies.get(SESSION_COOKIE)
+    if not store.is_valid_session_id(sid):
+        sid = store.new_session_id()
+    g.session_id = sid
+    return store.get(sid)
+
+
+@app.after_request
+def remember_session(response):
+    sid = g.get('session_id')
+    if sid and request.cookies.get(SESSION_COOKIE) != sid:
+        response.set_cookie(SESSION_COOKIE, sid, max_age=SESSION_MAX_AGE, httponly=True, samesite='Lax')
+    return response
 
 
 @app.route('/')
@@ -12,112 +46,298 @@ def index():
     return render_template('index.html')
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/get_state', methods=['GET'])
 def get_state():
+    world = current_world()
     if not world.is_initialized():
         return jsonify({"response": "INITIALIZING_GENESIS", "state": None})
 
+    if world.state_token() in request.if_none_match:
+        return state_response(Response(status=304), world)
+
     room = world.get_current_room()
-    return jsonify({"response": f"### {room['name']}\n{world.describe_room(room)}", "state": get_ui_state()})
+    prefetcher.prefetch_neighbours(world)
+    text = f"### {room['name']}\n{world.describe_room(room)}"
+    return state_response(jsonify({"response": text, "state": get_ui_state(world, full=True)}), world)
+
+
+def state_response(response, world):
+    # Revalidated on every load; a 304 skips re-describing the room and rebuilding the HUD.
+    response.set_etag(world.state_token())
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['Vary'] = 'Cookie'
+    return response
 
 
 @app.route('/reset', methods=['POST'])
 def reset_game():
-    world.hard_reset()
+    world = current_world()
     try:
-        genesis_data = ai.generate_genesis()
-        intro = world.initialize_world(genesis_data)
-        room = world.get_current_room()
-        full_text = f"{intro}\n\n### {room['name']}\n{world.describe_room(room)}"
-        return jsonify({"response": full_text, "state": get_ui_state()})
+        # A second reset while one is running shares its genesis instead of wiping the world again.
+        result = world.actor.run("reset", lambda: reset_world(world))
+        return jsonify(dict(result, state=get_ui_state(world, full=True)))
+    except QueueFull:
+        return queue_full_response()
+    except (SlotsExhausted, TurnAbandoned):
+        return busy_response()
     except Exception as e:
         return jsonify({"response": f"Genesis Failed: {str(e)}", "state": None})
 
 
+def reset_world(world):
+    with turn_slots.hold("reset"):
+        world.hard_reset()
+        genesis_data = ai.generate_genesis()
+    intro = world.initialize_world(genesis_data)
+    room = world.get_current_room()
+    full_text = f"{intro}\n\n### {room['name']}\n{world.describe_room(room)}"
+    prefetcher.prefetch_neighbours(world)
+    return {"response": full_text}
+
+
 @app.route('/command', methods=['POST'])
 def handle_command():
+    world = current_world()
     if not world.is_initialized():
         return jsonify({"response": "World not initialized. Please Reset."})
 
     user_input = request.json.get('input', '').strip()
-    clean_input = user_input.lower().strip()
     if not user_input:
         return jsonify({"response": ""})
 
+    try:
+        result = world.actor.run(command_key(user_input), lambda: run_command(world, user_input))
+    except QueueFull:
+        return queue_full_response()
+    except (SlotsExhausted, TurnAbandoned):
+        return busy_response()
+    return jsonify(with_client_state(world, result))
+
+
+def command_key(user_input):
+    # Identical in-flight commands (double submits, client retries, a second tab) share one turn.
+    return "command:" + " ".join(user_input.lower().split())
+
+
+def run_command(world, user_input):
+    result = run_local_command(world, user_input)
+    if result is None:
+        with turn_slots.hold("command"):
+            result = process_ai_turn(world, user_input)
+    return result
+
+
+def with_client_state(world, result):
+    # A shared result was built against another request's state version; rebuild the HUD for this one.
+    if result.get('state') is None:
+        return result
+    return dict(result, state=get_ui_state(world))
+
+
+def busy_response():
+    response = jsonify({"response": BUSY_TEXT, "busy": True})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(BUSY_RETRY_AFTER)
+    return response
+
+
+def queue_full_response():
+    response = jsonify({"response": QUEUE_FULL_TEXT, "busy": True})
+    response.status_code = 429
+    response.headers['Retry-After'] = "1"
+    return response
+
+
+@app.route('/command/stream', methods=['POST'])
+def handle_command_stream():
+    world = current_world()
+    user_input = request.json.get('input', '').strip()
+
+    if not world.is_initialized():
+        events = [sse_event("done", {"response": "World not initialized. Please Reset."})]
+    elif not user_input:
+        events = [sse_event("done", {"response": ""})]
+    else:
+        events = stream_command(world, user_input)
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def run_local_command(world, user_input):
+    # Everything the engine can answer without the DM; None means the input needs an AI turn.
+    clean_input = user_input.lower().strip()
+
     if clean_input in ['i', 'inv', 'inventory']:
-        items = [world.data['items'][i]['name'] for i in world.data['player']['inventory'] if i in world.data['items']]
-        worn = [world.data['items'][i]['name'] for i in world.data['player'].get('worn', []) if i in world.data['items']]
-        if not items and not worn:
-            return jsonify({"response": "You are not carrying anything.", "state": get_ui_state()})
-
-        output = []
-        if items:
-            output.append("**You are carrying:**\n" + "\n".join([f"- {name}" for name in items]))
-        if worn:
-            output.append("**You are wearing:**\n" + "\n".join([f"- {name}" for name in worn]))
-        return jsonify({"response": "\n\n".join(output), "state": get_ui_state()})
+        return {"response": world.describe_inventory(), "state": get_ui_state(world)}
 
     if clean_input in ['l', 'look']:
         room = world.get_current_room()
-        return jsonify({"response": f"### {room['name']}\n{world.describe_room(room)}", "state": get_ui_state()})
+        return {"response": f"### {room['name']}\n{world.describe_room(room)}", "state": get_ui_state(world)}
 
     if clean_input.startswith('x ') or clean_input.startswith('examine '):
         parts = clean_input.split(' ', 1)
         if len(parts) > 1:
             target = parts[1].strip()
             if world.is_self_reference(target):
-                return jsonify({"response": world.describe_player(), "state": get_ui_state()})
+                return {"response": world.describe_player(), "state": get_ui_state(world)}
 
             item = world.get_item_by_name(target)
             if item:
-                return jsonify({"response": item['description'], "state": get_ui_state()})
+                return {"response": item['description'], "state": get_ui_state(world)}
+
+    parsed = parse_command(clean_input)
+    if parsed:
+        verb, noun = parsed
+        if verb == "go":
+            return move_command(world, noun)
+        if verb == "travel":
+            return travel_command(world, noun) or move_command(world, noun)
+        response = execute_command(world, verb, noun)
+        if response:
+            return {"response": response, "state": get_ui_state(world)}
+
+    return move_command(world, user_input)
 
+
+def move_command(world, user_input):
     status, target, prev_id = world.move_player(user_input)
 
     if status == "ok":
         room = world.get_room(target)
-        return jsonify({"response": f"### {room['name']}\n{world.describe_room(room)}", "state": get_ui_state()})
+        prefetcher.prefetch_neighbours(world)
+        return {"response": f"### {room['name']}\n{world.describe_room(room)}", "state": get_ui_state(world)}
 
     if status == "generate":
         prev = world.get_room(prev_id)
-        thread = world.data.get('narrative_thread', '')
-        new_data = ai.generate_room(prev, user_input, thread)
-        world.create_room_from_stub(target, new_data)
-        room = world.get_room(target)
-        return jsonify({"response": f"### {room['name']}\n{world.describe_room(room)}", "state": get_ui_state()})
+        # Joining a prefetch or generating the room inline waits on the model like a DM turn, so it
+        # takes a slot too; when none is free the caller answers busy the same way.
+        with turn_slots.hold("move"):
+            arrived = prefetcher.fetch(world, target, prev, user_input)
+        if not arrived:
+            return {"response": "The way ahead dissolves into grey haze, and you find yourself back where you started. Try again in a moment.",
+                    "state": get_ui_state(world)}
+        return move_command(world, user_input)
 
     if status == "error":
         if "Invalid direction" in target:
-            return process_ai_turn(user_input)
-        return jsonify({"response": target, "state": get_ui_state()})
+            return None
+        return {"response": target, "state": get_ui_state(world)}
 
-    return jsonify({"response": "Error."})
+    return {"response": "Error."}
 
 
-def process_ai_turn(inp):
-    room = world.get_current_room()
-    inv = [world.data['items'][i] for i in world.data['player']['inventory'] if i in world.data['items']]
-    worn = [world.data['items'][i] for i in world.data['player'].get('worn', []) if i in world.data['items']]
-    thread = world.data.get('narrative_thread', '')
+def travel_command(world, destination):
+    status, walked = world.travel(destination)
+    if status == "unknown":
+        return None
+    if status == "here":
+        return {"response": "You're already there.", "state": get_ui_state(world)}
+    if status == "unreachable":
+        return {"response": "You don't know a way there from here.", "state": get_ui_state(world)}
+
+    room = walked[-1]
+    lines = [f"*You make your way through {', '.join(r['name'] for r in walked[:-1])}.*"] if len(walked) > 1 else []
+    prefetcher.prefetch_neighbours(world)
+    lines.append(f"### {room['name']}\n{world.describe_room(room)}")
+    return {"response": "\n\n".join(lines), "state": get_ui_state(world)}
+
+
+def cached_outcome(world, inp):
+    if not world.get_setting('outcome_cache'):
+        return None, None
+    key = world.outcome_cache.key(world, inp)
+    return key, world.outcome_cache.get(key)
+
 
-    outcome = ai.process_turn(inp, room, inv, worn, world.data.get('player', {}), thread)
-    world.apply_outcome(outcome)
+def process_ai_turn(world, inp):
+    key, outcome = cached_outcome(world, inp)
+    if outcome is None:
+        outcome = ai.process_turn(inp, ai.context.build_dm(world, inp))
+        if key:
+            world.outcome_cache.put(key, outcome)
+    world.apply_outcome(outcome, inp)
 
-    return jsonify({"response": outcome.get("narrative", "..."), "state": get_ui_state()})
+    return {"response": outcome.get("narrative", "..."), "state": get_ui_state(world)}
 
 
-def get_ui_state():
+def stream_command(world, user_input):
+    # Same actor discipline as /command. Headers are already sent when this runs, so refusals travel
+    # as the done event; a duplicate gets only the shared done event, not the narrative pieces.
+    key = command_key(user_input)
+    try:
+        ticket, leader = world.actor.enter(key)
+    except QueueFull:
+        yield sse_event("done", {"response": QUEUE_FULL_TEXT, "busy": True})
+        return
+    if not leader:
+        try:
+            result = with_client_state(world, ticket.result())
+        except (SlotsExhausted, TurnAbandoned):
+            result = {"response": BUSY_TEXT, "busy": True}
+        except Exception as e:
+            result = turn_failed(e)
+        yield sse_event("done", result)
+        return
+
+    try:
+        result = run_local_command(world, user_input)
+        if result is None:
+            with turn_slots.hold("stream"):
+                for text in stream_ai_turn(world, user_input):
+                    if isinstance(text, dict):
+                        result = text
+                    else:
+                        yield sse_event("narrative", {"text": text})
+        ticket.set_result(result)
+    except SlotsExhausted as e:
+        ticket.set_exception(e)
+        result = {"response": BUSY_TEXT, "busy": True}
+    except Exception as e:
+        # Shared with any duplicate waiting on the ticket, and the stream still ends with a done event.
+        ticket.set_exception(e)
+        result = turn_failed(e)
+    finally:
+        world.actor.leave(key, ticket)
+    yield sse_event("done", result)
+
+
+def turn_failed(e):
+    return {"response": f"Turn Failed: {str(e)}", "state": None}
+
+
+def stream_ai_turn(world, inp):
+    # Yields narrative text pieces, then the finished result dict.
+    key, outcome = cached_outcome(world, inp)
+    if outcome is None:
+        for kind, value in ai.stream_turn(inp, ai.context.build_dm(world, inp)):
+            if kind == "narrative":
+                yield value
+            else:
+                outcome = value
+        if key:
+            world.outcome_cache.put(key, outcome)
+
+    world.apply_outcome(outcome, inp)
+    yield {"response": outcome.get("narrative", "..."), "state": get_ui_state(world)}
+
+
+def sse_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def get_ui_state(world, full=False):
     if not world.is_initialized():
         return None
-
-    room = world.get_current_room()
-    inv = [world.data['items'][i]['name'] for i in world.data['player']['inventory'] if i in world.data['items']]
-    return {
-        "location": room.get('name', 'Unknown'),
-        "inventory": inv,
-        "exits": list(room.get('exits', {}).keys())
-    }
+    return world.ui_state.for_client(world, None if full else g.get('state_version'))
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    app.run(host="0.0.0.0", port=5000, threaded=True)
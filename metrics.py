@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+from collections import defaultdict
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+# USD per million (input, output) tokens; override with FROTZ_MODEL_PRICES='{"model": [in, out]}'.
+MODEL_PRICES = {
+    "mistral-large-latest": (2.0, 6.0),
+    "mistral-medium-latest": (0.4, 2.0),
+    "mistral-small-latest": (0.1, 0.3),
+}
+MODEL_PRICES.update({k: tuple(v) for k, v in json.loads(os.environ.get("FROTZ_MODEL_PRICES", "{}")).items()})
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, '') for n in self.labels), 0.0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value:g}" for key, value in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+            counts = series[:len(self.buckets)] + [series[-1]]
+            for bound, count in zip(bounds, counts, strict=True):
+                labels = _format_labels(self.labels, key, 'le="' + bound + '"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {series[-2]:g}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = []
+        for metric in metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.render())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_LATENCY = REGISTRY.histogram("frotz_llm_request_seconds", "LLM call latency by role.", ("role", "model"))
+LLM_REQUESTS = REGISTRY.counter("frotz_llm_requests_total", "LLM calls by role and result.", ("role", "model", "result"))
+LLM_TOKENS = REGISTRY.counter("frotz_llm_tokens_total", "Tokens reported by the provider.", ("role", "model", "kind"))
+LLM_RETRIES = REGISTRY.counter("frotz_llm_retries_total", "Transport-level retries (429/5xx/connection).", ("role",))
+LLM_COST = REGISTRY.counter("frotz_llm_cost_usd_total", "Estimated spend from token usage and MODEL_PRICES.", ("role", "model"))
+LLM_HEDGES = REGISTRY.counter("frotz_llm_hedges_total", "Duplicate requests fired after the hedge delay.", ("role",))
+LLM_HEDGE_WINS = REGISTRY.counter("frotz_llm_hedge_wins_total", "Hedged calls where the duplicate answered first.", ("role",))
+LLM_DEADLINE_MISSES = REGISTRY.counter("frotz_llm_deadline_misses_total", "Calls answered with the fallback after the role deadline.", ("role",))
+LLM_ROUTES = REGISTRY.counter("frotz_llm_routes_total", "Model route decisions by role, route and reason.", ("role", "route", "reason"))
+LLM_ROUTE_SECONDS = REGISTRY.histogram("frotz_llm_route_seconds", "End-to-end call latency by route, escalations included.", ("role", "route"))
+STARTUP_SECONDS = REGISTRY.histogram("frotz_startup_seconds", "Worker cold start: app import until ready to serve.", ("phase",),
+                                     buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0))
+WORLD_LOAD_SECONDS = REGISTRY.histogram("frotz_world_load_seconds", "First load of a world per process, by phase (load, migrate).",
+                                        ("phase",), buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+RENDER_CACHE = REGISTRY.counter("frotz_render_cache_total", "Room/player/inventory text lookups by result.", ("kind", "result"))
+TURNS_SHED = REGISTRY.counter("frotz_turns_shed_total", "AI turns refused because every AI turn slot was busy.", ("path",))
+COMMANDS_DEDUPED = REGISTRY.counter("frotz_commands_deduped_total", "Commands that joined an identical in-flight command.")
+COMMANDS_REJECTED = REGISTRY.counter("frotz_commands_rejected_total", "Commands refused because the world's queue was full.")
+SAVES_COALESCED = REGISTRY.counter("frotz_saves_coalesced_total", "Saves folded into the next write while commands were queued.")
+
+
+def estimate_cost(model, input_tokens, output_tokens):
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return ((input_tokens or 0) * price_in + (output_tokens or 0) * price_out) / 1_000_000
+
+
+def observe_llm_call(role, model, seconds, usage_info, error=None):
+    LLM_LATENCY.observe(seconds, role=role, model=model)
+    LLM_REQUESTS.inc(role=role, model=model, result="error" if error else "ok")
+    observe_llm_usage(role, model, usage_info)
+
+
+def observe_llm_discard(role, model, usage_info):
+    # A hedged attempt that lost still used (and billed) tokens.
+    LLM_REQUESTS.inc(role=role, model=model, result="discarded")
+    observe_llm_usage(role, model, usage_info)
+
+
+def observe_llm_usage(role, model, usage_info):
+    input_tokens = usage_info.get('input_tokens') or 0
+    output_tokens = usage_info.get('output_tokens') or 0
+    if input_tokens:
+        LLM_TOKENS.inc(input_tokens, role=role, model=model, kind="input")
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, role=role, model=model, kind="output")
+    cost = estimate_cost(model, input_tokens, output_tokens)
+    if cost:
+        LLM_COST.inc(cost, role=role, model=model)
@@ -0,0 +1,231 @@
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CORPUS_FILE = "debug_log.txt"
+HEADER_RE = re.compile(r"^--- .+ \[([A-Z]+)\] ---$", re.MULTILINE)
+STUB_ID_RE = re.compile(r'"stub_id":\s*"([^"]+)"')
+STREAM_CHUNK_CHARS = 24
+DIRECTIONS = ("north", "south", "east", "west")
+
+# The compiled system prompt always opens with the role's instructions.
+ROLE_MARKERS = (
+    ("GENESIS", "'Great Creator'"),
+    ("REGION", "'Regional Architect'"),
+    ("ARCHITECT", "'Lead Architect'"),
+    ("DM", "'Dungeon Master'"),
+)
+
+
+def load_corpus(path=CORPUS_FILE):
+    # Recorded outputs per role from the legacy debug log ("--- ts [ROLE] ---" ... "[OUTPUT]: {json}").
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    corpus = {}
+    headers = list(HEADER_RE.finditer(text))
+    for n, header in enumerate(headers):
+        end = headers[n + 1].start() if n + 1 < len(headers) else len(text)
+        body = text[header.end():end]
+        _, sep, output = body.partition("[OUTPUT]: ")
+        if not sep:
+            continue
+        try:
+            data = json.loads(output.strip())
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or data.get('error'):
+            continue
+        data.pop('_usage', None)
+        corpus.setdefault(header.group(1), []).append(data)
+    return corpus
+
+
+def detect_role(system):
+    for role, marker in ROLE_MARKERS:
+        if marker in system:
+            return role
+    return "DM"
+
+
+# Stand-in for the chat-completions endpoint: replays recorded outputs round-robin per role after an
+# injected delay, with OpenAI/Mistral-shaped JSON or SSE responses. Point MISTRAL_API_URL at it.
+class MockMistral:
+    def __init__(self, corpus=None, latency=0.5, jitter=0.2, error_rate=0.0, branching=0, seed=None,
+                 slow_rate=0.0, slow_latency=5.0, small_speedup=1.0):
+        self.corpus = corpus if corpus is not None else load_corpus()
+        if not self.corpus:
+            raise ValueError("mock corpus is empty")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.branching = branching
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.small_speedup = max(small_speedup, 0.01)
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._cycles = {role: itertools.cycle(outputs) for role, outputs in self.corpus.items()}
+        self._serial = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self, host="127.0.0.1", port=0):
+        handler = type("Handler", (MockHandler,), {"mock": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-mistral", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def delay(self, model=None):
+        with self._lock:
+            if self.slow_rate > 0 and self._random.random() < self.slow_rate:
+                return self.slow_latency
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        # Models named "*small*" answer `small_speedup` times faster, to exercise model routing.
+        return delay / self.small_speedup if model and "small" in model else delay
+
+    def should_fail(self):
+        with self._lock:
+            self.requests += 1
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    def reply(self, system):
+        role = detect_role(system)
+        if role == "REGION":
+            # No recorded region calls: answer with one replayed ARCHITECT room per requested stub.
+            rooms = [dict(json.loads(self._reply_for("ARCHITECT")), stub_id=sid) for sid in STUB_ID_RE.findall(system)]
+            return json.dumps({"rooms": rooms})
+        return self._reply_for(role)
+
+    def _reply_for(self, role):
+        with self._lock:
+            cycle = self._cycles.get(role) or self._cycles.get("DM") or next(iter(self._cycles.values()))
+            data = json.loads(json.dumps(next(cycle)))
+            serial = next(self._serial)
+            exits = self._random.sample(DIRECTIONS, self.branching) if self.branching else None
+        if role == "ARCHITECT":
+            # The recorded rooms mostly exit back the way the player came; `branching` keeps a frontier open.
+            if exits:
+                data['new_exits'] = exits
+            # Unique item ids per generated room, so replayed rooms grow the world like real ones.
+            for item in data.get('items', []):
+                if item.get('id'):
+                    item['id'] = f"{item['id']}_{serial}"
+        return json.dumps(data)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    mock = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {"error": "invalid json"})
+
+        time.sleep(self.mock.delay(payload.get('model')))
+        if self.mock.should_fail():
+            return self._send_json(503, {"error": "injected failure"}, {"Retry-After": "0"})
+
+        messages = payload.get('messages', [])
+        system = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+        prompt_chars = sum(len(m.get('content', '')) for m in messages)
+        content = self.mock.reply(system)
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_chars // 4 + len(content) // 4,
+        }
+
+        if payload.get('stream'):
+            return self._send_stream(content, usage)
+        self._send_json(200, {
+            "id": "mock",
+            "object": "chat.completion",
+            "model": payload.get('model'),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _send_json(self, status, body, headers=None):
+        raw = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_stream(self, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        chunks = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        for n, chunk in enumerate(chunks):
+            event = {"choices": [{"index": 0, "delta": {"content": chunk}}]}
+            if n == len(chunks) - 1:
+                event["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local chat-completions stand-in replaying debug_log.txt outputs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean injected delay per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="uniform +/- jitter on the delay (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    parser.add_argument("--branching", type=int, default=0, choices=range(0, 5),
+                        help="replace recorded ARCHITECT exits with this many random directions")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of calls delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="delay for the slow tail (seconds)")
+    parser.add_argument("--small-speedup", type=float, default=1.0, help="latency divisor for *small* models")
+    parser.add_argument("--corpus", default=CORPUS_FILE)
+    args = parser.parse_args()
+
+    mock = MockMistral(load_corpus(args.corpus), args.latency, args.jitter, args.error_rate, args.branching,
+                       slow_rate=args.slow_rate, slow_latency=args.slow_latency, small_speedup=args.small_speedup)
+    mock.start(args.host, args.port)
+    print(f"Mock Mistral listening on {mock.url} ({', '.join(f'{k}={len(v)}' for k, v in mock.corpus.items())})")
+    try:
+        mock._thread.join()
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
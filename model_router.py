@@ -0,0 +1,123 @@
+import os
+import re
+
+from metrics import LLM_ROUTE_SECONDS, LLM_ROUTES
+
+LARGE_MODEL = os.environ.get("LLM_MODEL_LARGE", "mistral-large-latest")
+SMALL_MODEL = os.environ.get("LLM_MODEL_SMALL", "mistral-small-latest")
+# Per role: "large", "small", or "auto" (classify the player's input; only meaningful for DM).
+ROLE_ROUTES = {
+    "GENESIS": os.environ.get("LLM_ROUTE_GENESIS", "large"),
+    "ARCHITECT": os.environ.get("LLM_ROUTE_ARCHITECT", "large"),
+    "REGION": os.environ.get("LLM_ROUTE_REGION", "large"),
+    "DM": os.environ.get("LLM_ROUTE_DM", "auto"),
+}
+ROUTE_MIN_CONFIDENCE = float(os.environ.get("LLM_ROUTE_MIN_CONFIDENCE", "0.7"))
+# Opt-in: also redo small-model outcomes that change world state on the large model (non-streamed turns).
+# Off by default, since most small-model state changes are fine and each redo pays for two calls.
+ESCALATE_STATE_CHANGES = os.environ.get("LLM_ROUTE_ESCALATE_STATE", "0") == "1"
+
+WORD_RE = re.compile(r"[a-z']+")
+# Gestures, postures and senses: the DM only has to narrate these.
+SIMPLE_VERBS = {
+    "sit", "stand", "lie", "lay", "sleep", "rest", "wait", "listen", "smell", "sniff", "touch", "feel",
+    "yawn", "stretch", "sing", "hum", "whistle", "dance", "jump", "hop", "laugh", "cry", "smile", "nod",
+    "wave", "shrug", "sigh", "pray", "think", "ponder", "knock", "clap", "blink", "breathe", "relax", "pace",
+    "kneel", "crouch", "hide", "shout", "scream", "cough", "sneeze", "stare", "watch", "lean",
+}
+# Verbs that usually change the world, involve other characters or need the room and items reasoned about.
+COMPLEX_VERBS = {
+    "use", "combine", "give", "ask", "tell", "talk", "say", "speak", "attack", "fight", "kill", "hit",
+    "open", "close", "unlock", "lock", "break", "smash", "craft", "build", "make", "put", "place", "throw",
+    "cast", "write", "pour", "mix", "fill", "empty", "climb", "push", "pull", "move", "light", "burn",
+    "cut", "tie", "fix", "repair", "eat", "drink", "search", "dig", "insert", "turn", "read",
+    "call", "text", "buy", "sell", "steal", "cook", "plant", "wake", "kiss", "hug",
+}
+# Words that join actions or objects ("and then", "with", "using") make an input compound.
+CONNECTIVES = {"and", "then", "with", "using", "into", "onto", "from", "while", "until", "because", "if", "so"}
+STATE_KEYS = (
+    "inventory_add", "inventory_remove", "room_add", "room_remove", "wear_add", "wear_remove",
+    "update_description", "room_base_description_update", "current_room_base_description",
+    "player_description_update", "item_visibility_update",
+)
+
+
+class Route:
+    __slots__ = ('name', 'model', 'reason', 'confidence')
+
+    def __init__(self, name, model, reason, confidence=None):
+        self.name = name
+        self.model = model
+        self.reason = reason
+        self.confidence = confidence
+
+
+def classify(user_input, min_confidence=ROUTE_MIN_CONFIDENCE):
+    # Local, feature-based: returns (intent, confidence that the small model can handle it).
+    text = (user_input or '').lower()
+    words = WORD_RE.findall(text)
+    if not words:
+        return "empty", 0.0
+    if '"' in text or '?' in text:
+        return "dialogue", 0.1
+
+    confidence = 0.5
+    verb = words[0]
+    if verb in SIMPLE_VERBS:
+        confidence += 0.35
+    if verb in COMPLEX_VERBS:
+        confidence -= 0.4
+    if len(words) <= 3:
+        confidence += 0.1
+    elif len(words) > 6:
+        confidence -= 0.3
+    if any(w in CONNECTIVES for w in words[1:]):
+        confidence -= 0.4
+    confidence = max(0.0, min(1.0, confidence))
+    return ("simple" if confidence >= min_confidence else "complex"), confidence
+
+
+# Picks the model for each call. Roles are routed by configuration; "auto" roles are classified on
+# the player's input, and small-model results that fail (or, if enabled, touch world state) escalate to the large model.
+class ModelRouter:
+    def __init__(self, routes=None, large=LARGE_MODEL, small=SMALL_MODEL, min_confidence=ROUTE_MIN_CONFIDENCE,
+                 escalate_state=ESCALATE_STATE_CHANGES):
+        self.routes = dict(ROLE_ROUTES if routes is None else routes)
+        self.models = {"large": large, "small": small}
+        self.min_confidence = min_confidence
+        self.escalate_state = escalate_state
+
+    def route(self, role, user_input=None):
+        mode = self.routes.get(role, "large")
+        if mode != "auto":
+            name = mode if mode in self.models else "large"
+            return self._decide(role, name, "configured")
+        if user_input is None:
+            return self._decide(role, "large", "generation")
+        intent, confidence = classify(user_input, self.min_confidence)
+        if confidence >= self.min_confidence:
+            return self._decide(role, "small", f"intent_{intent}", confidence)
+        return self._decide(role, "large", f"intent_{intent}", confidence)
+
+    def escalation(self, route, outcome, streamed=False):
+        # Why a small-model outcome should be redone on the large model, or None to keep it.
+        if route.name != "small" or not isinstance(outcome, dict):
+            return None
+        if outcome.get('deadline'):
+            return None  # the role's time budget is already spent
+        if outcome.get('error'):
+            return "error"
+        if self.escalate_state and not streamed and any(outcome.get(key) for key in STATE_KEYS):
+            return "state_change"
+        return None
+
+    def escalate(self, role, reason):
+        return self._decide(role, "large", f"escalated_{reason}")
+
+    def observe(self, role, route, seconds):
+        name = "escalated" if route.reason.startswith("escalated_") else route.name
+        LLM_ROUTE_SECONDS.observe(seconds, role=role, route=name)
+
+    def _decide(self, role, name, reason, confidence=None):
+        LLM_ROUTES.inc(role=role, route=name, reason=reason)
+        return Route(name, self.models[name], reason, confidence)
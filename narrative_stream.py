@@ -0,0 +1,70 @@
+import re
+
+NARRATIVE_KEY_RE = re.compile(r'"narrative"\s*:\s*"')
+SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+# Pulls the "narrative" string out of a DM JSON object while it is still arriving token by token,
+# so the player can read it before the rest of the object (the state changes) has been generated.
+class NarrativeStream:
+    def __init__(self, key_re=NARRATIVE_KEY_RE):
+        self.key_re = key_re
+        self.buffer = ""
+        self.pos = None
+        self.done = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self.pos is None:
+            match = self.key_re.search(self.buffer)
+            if not match:
+                return ""
+            self.pos = match.end()
+
+        buf = self.buffer
+        out = []
+        i = self.pos
+        while i < len(buf):
+            c = buf[i]
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            if c != '\\':
+                out.append(c)
+                i += 1
+                continue
+            if i + 1 >= len(buf):
+                break
+            esc = buf[i + 1]
+            if esc != 'u':
+                out.append(SIMPLE_ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            decoded, consumed = self._unicode_escape(buf, i)
+            if not consumed:
+                break
+            out.append(decoded)
+            i += consumed
+
+        self.pos = i
+        return "".join(out)
+
+    def _unicode_escape(self, buf, i):
+        if i + 6 > len(buf):
+            return "", 0
+        code = int(buf[i + 2:i + 6], 16)
+        if 0xD800 <= code < 0xDC00:
+            # High surrogate: wait for its low half so we never emit an unencodable lone surrogate.
+            if i + 12 > len(buf):
+                return "", 0
+            if buf[i + 6:i + 8] == '\\u':
+                low = int(buf[i + 8:i + 12], 16)
+                if 0xDC00 <= low < 0xE000:
+                    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), 12
+            return "�", 6
+        if 0xDC00 <= code < 0xE000:
+            return "�", 6
+        return chr(code), 6
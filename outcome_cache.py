@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from world_model import plain
+
+OUTCOME_CACHE_SIZE = int(os.environ.get("FROTZ_OUTCOME_CACHE_SIZE", "128"))
+
+INPUT_WORD_RE = re.compile(r"[a-z0-9']+")
+FILLER_WORDS = {"the", "a", "an", "please"}
+
+# Outcome keys that are safe to replay; the thread summary and usage belong to the original turn.
+REPLAY_EXCLUDED_KEYS = {"narrative_summary_update", "_usage"}
+
+
+def normalize_input(text):
+    return " ".join(w for w in INPUT_WORD_RE.findall(text.lower()) if w not in FILLER_WORDS)
+
+
+# Caches DM outcomes by (fingerprint of the world slice the DM sees, normalized input). Any change
+# apply_outcome makes to that slice changes the fingerprint, so stale entries are simply never hit
+# again and age out of the LRU.
+class OutcomeCache:
+    def __init__(self, max_entries=OUTCOME_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, world, user_input):
+        data = world.data
+        items = data['items']
+        player = data['player']
+        room = world.get_current_room()
+
+        room_slice = {k: v for k, v in room.items() if k not in ('description', 'visited')}
+        item_ids = list(room.get('items', [])) + list(player.get('inventory', [])) + list(player.get('worn', []))
+        slice_ = {
+            "room": room_slice,
+            "items": [items.get(iid) for iid in item_ids],
+            "player": {
+                "inventory": player.get('inventory', []),
+                "worn": player.get('worn', []),
+                "description": player.get('description'),
+            },
+            "input": normalize_input(user_input),
+        }
+        blob = json.dumps(slice_, sort_keys=True, separators=(',', ':'), default=plain)
+        return hashlib.blake2b(blob.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            outcome = self._entries.get(key)
+            if outcome is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return dict(outcome)
+
+    def put(self, key, outcome):
+        if not outcome or outcome.get('error'):
+            return
+        replay = {k: v for k, v in outcome.items() if k not in REPLAY_EXCLUDED_KEYS}
+        with self._lock:
+            self._entries[key] = replay
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
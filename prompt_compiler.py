@@ -0,0 +1,100 @@
+import os
+import threading
+
+DEFAULT_LORE = "A mysterious text adventure."
+
+
+def common_prefix_bytes(a, b):
+    # Binary search on slice equality: each probe is one C-level compare rather than a per-character loop.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return len(a[:lo].encode('utf-8'))
+
+
+# Each role's system prompt is `static` (instructions + lore bible, identical on every call) followed
+# by `context` (the per-call data). Keeping the volatile part at the end gives every call the same
+# byte-for-byte prefix, which is what provider-side prompt caching keys on.
+class PromptCompiler:
+    def __init__(self, lore_file, default_lore=DEFAULT_LORE):
+        self.lore_file = lore_file
+        self.default_lore = default_lore
+        self._templates = {}  # role -> (static template, context template or None)
+        self._prefixes = {}  # role -> (compiled static prefix, its UTF-8 size)
+        self._last_prompt = {}  # role -> (static prefix, context tail) of the previous call
+        self._stats = {}
+        self._lore = None
+        self._lore_mtime = None
+        self._lock = threading.Lock()
+
+    def register(self, role, static, context=None):
+        with self._lock:
+            self._templates[role] = (static, context)
+            self._prefixes.pop(role, None)
+            self._stats[role] = {"calls": 0, "prompt_bytes": 0, "shared_prefix_bytes": 0, "last_prompt_bytes": 0, "last_shared_bytes": 0}
+
+    def lore(self):
+        with self._lock:
+            return self._current_lore()
+
+    def compile(self, role, **context):
+        # Returns (prompt, UTF-8 bytes it shares from the start with this role's previous prompt).
+        with self._lock:
+            self._current_lore()
+            static, context_template = self._templates[role]
+            if role not in self._prefixes:
+                prefix = static.format(lore_bible=self._lore)
+                self._prefixes[role] = (prefix, len(prefix.encode('utf-8')))
+            prefix, prefix_bytes = self._prefixes[role]
+
+            tail = context_template.format(**context) if context_template else ""
+            prompt_bytes = prefix_bytes + len(tail.encode('utf-8'))
+            last_prefix, last_tail = self._last_prompt.get(role, ("", ""))
+            if last_prefix is prefix:
+                shared = prefix_bytes + common_prefix_bytes(last_tail, tail)
+            else:
+                shared = common_prefix_bytes(last_prefix + last_tail, prefix + tail)
+            self._last_prompt[role] = (prefix, tail)
+
+            stats = self._stats[role]
+            stats["calls"] += 1
+            stats["prompt_bytes"] += prompt_bytes
+            stats["shared_prefix_bytes"] += shared
+            stats["last_prompt_bytes"] = prompt_bytes
+            stats["last_shared_bytes"] = shared
+        return prefix + tail, shared
+
+    def stats(self, role=None):
+        with self._lock:
+            roles = [role] if role else list(self._stats)
+            report = {}
+            for r in roles:
+                stats = dict(self._stats[r])
+                total = stats["prompt_bytes"]
+                stats["shared_ratio"] = round(stats["shared_prefix_bytes"] / total, 4) if total else 0.0
+                report[r] = stats
+        return report[role] if role else report
+
+    def _current_lore(self):
+        # Caller holds the lock. A stat per call is far cheaper than the read it replaces.
+        try:
+            mtime = os.stat(self.lore_file).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if self._lore is not None and mtime == self._lore_mtime:
+            return self._lore
+
+        if mtime is None:
+            lore = self.default_lore
+        else:
+            with open(self.lore_file, 'r', encoding='utf-8') as f:
+                lore = f.read()
+        self._lore = lore
+        self._lore_mtime = mtime
+        self._prefixes.clear()
+        return lore
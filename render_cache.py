@@ -0,0 +1,24 @@
+from metrics import RENDER_CACHE
+
+
+# Rendered text for one world (room descriptions, the player, the inventory listing), each stored with
+# the version stamp of what it was built from. WorldManager.mark_dirty bumps those versions, so a
+# changed room or player simply misses on its next lookup; nothing has to invalidate entries by hand.
+class RenderCache:
+    def __init__(self):
+        self._entries = {}  # (kind, key) -> (stamp, text)
+
+    def get(self, kind, key, stamp):
+        entry = self._entries.get((kind, key))
+        if entry is not None and entry[0] == stamp:
+            RENDER_CACHE.inc(kind=kind, result="hit")
+            return entry[1]
+        RENDER_CACHE.inc(kind=kind, result="miss")
+        return None
+
+    def put(self, kind, key, stamp, text):
+        self._entries[(kind, key)] = (stamp, text)
+        return text
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,106 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PREFETCH_ENABLED = os.environ.get("FROTZ_PREFETCH", "1") == "1"
+PREFETCH_WORKERS = int(os.environ.get("FROTZ_PREFETCH_WORKERS", "4"))
+# Region mode: one Architect call fills every stub within this many exits (0 = one call per stub).
+REGION_DEPTH = int(os.environ.get("FROTZ_REGION_DEPTH", "2"))
+REGION_MAX_STUBS = int(os.environ.get("FROTZ_REGION_MAX_STUBS", "6"))
+
+
+class RoomPrefetcher:
+    def __init__(self, ai, max_workers=PREFETCH_WORKERS, enabled=PREFETCH_ENABLED,
+                 region_depth=REGION_DEPTH, region_max_stubs=REGION_MAX_STUBS):
+        self.ai = ai
+        self.enabled = enabled
+        self.region_depth = region_depth
+        self.region_max_stubs = max(1, region_max_stubs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="room-prefetch")
+        self._jobs = {}  # (id(world), stub id) -> Future of {stub id: room data}; a region shares one Future
+        self._jobs_lock = threading.Lock()
+
+    def prefetch_neighbours(self, world):
+        if not self.enabled or not world.is_initialized():
+            return
+        with world.lock:
+            room = world.get_current_room()
+            if not room:
+                return
+            if self.region_depth > 0:
+                stubs = world.frontier_stubs(self.region_depth, self.region_max_stubs)
+            else:
+                stubs = [(stub_id, room, d) for d, stub_id in room.get('exits', {}).items() if world.is_stub(stub_id)]
+            with self._jobs_lock:
+                stubs = [s for s in stubs if (id(world), s[0]) not in self._jobs]
+            if self.region_depth > 0 and len(stubs) > 1:
+                self._submit(world, stubs)
+            else:
+                for stub in stubs:
+                    self._submit(world, [stub])
+
+    def fetch(self, world, stub_id, prev_room, direction):
+        # Called when the player walks into a stub; returns whether it is a room now. A speculative job
+        # that has started is joined. One still queued behind other worlds' prefetches is cancelled,
+        # and the room is generated here on the request thread instead. A failed or missing result
+        # counts as a miss; if generating it here fails too, the stub stays a stub.
+        with world.lock:
+            if not world.is_stub(stub_id):
+                return True
+            with self._jobs_lock:
+                future = self._jobs.get((id(world), stub_id))
+
+        data = None
+        if future is not None and not future.cancel():
+            try:
+                data = future.result().get(stub_id)
+            except Exception:
+                data = None
+        if not data or data.get('error'):
+            data = self.ai.generate_room(prev_room, direction, world.data.get('narrative_thread', ''))
+        with world.lock:
+            if data and not data.get('error'):
+                self._commit(world, {stub_id: data})
+            return not world.is_stub(stub_id)
+
+    def pending(self, world):
+        with self._jobs_lock:
+            return [stub_id for (wid, stub_id) in self._jobs if wid == id(world)]
+
+    def _submit(self, world, stubs):
+        thread = world.data.get('narrative_thread', '')
+        if len(stubs) == 1:
+            stub_id, prev_room, direction = stubs[0]
+            future = self._executor.submit(lambda: {stub_id: self.ai.generate_room(prev_room, direction, thread)})
+        else:
+            future = self._executor.submit(self.ai.generate_region, stubs, thread)
+        stub_ids = [stub_id for stub_id, _, _ in stubs]
+        with self._jobs_lock:
+            for stub_id in stub_ids:
+                self._jobs[(id(world), stub_id)] = future
+        future.add_done_callback(lambda f: self._finish(world, stub_ids, f))
+        return future
+
+    def _finish(self, world, stub_ids, future):
+        rooms = {}
+        if not future.cancelled() and future.exception() is None:
+            rooms = {sid: data for sid, data in future.result().items() if data and not data.get('error')}
+        with world.lock:
+            # Commit what came back; failed or missing stubs are forgotten so a later move retries them.
+            self._commit(world, rooms)
+            for stub_id in stub_ids:
+                self._forget(world, stub_id, future)
+
+    def _commit(self, world, rooms):
+        # Caller holds world.lock, so the checks, the fill and the job removal are one step.
+        fill = {stub_id: data for stub_id, data in rooms.items() if world.is_stub(stub_id)}
+        if fill:
+            world.create_rooms_from_stubs(fill)
+        for stub_id in rooms:
+            self._forget(world, stub_id)
+
+    def _forget(self, world, stub_id, future=None):
+        with self._jobs_lock:
+            key = (id(world), stub_id)
+            if future is None or self._jobs.get(key) is future:
+                self._jobs.pop(key, None)
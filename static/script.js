@@ -1,6 +1,7 @@
 const input = document.getElementById('cmd-input');
 const log = document.getElementById('log');
 const hud = document.getElementById('hud');
+let hudState = {};
 
 window.addEventListener('DOMContentLoaded', async () => {
     try {
@@ -52,29 +53,65 @@ async function sendCommand() {
     appendLog(`> ${text}`, 'user');
     input.value = '';
 
-    let data;
+    let div = null;
+    let streamed = '';
 
     try {
-        const res = await fetch('/command', {
+        const res = await fetch('/command/stream', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({input: text})
+            body: JSON.stringify({input: text, state_version: hudState.version})
         });
 
         if (!res.ok) {
             throw new Error(`HTTP ${res.status}`);
         }
 
-        data = await res.json();
+        div = appendLog('', 'ai');
+        await readEvents(res, (event, data) => {
+            if (event === 'narrative') {
+                // Plain text while streaming; the finished narrative is rendered as markdown below.
+                streamed += data.text;
+                div.textContent = streamed;
+                scrollTerminal();
+            } else if (event === 'done') {
+                div.innerHTML = marked.parse(data.response || "");
+                scrollTerminal();
+                appendUsage(data.usage);
+                if (data.state) updateHUD(data.state);
+            }
+        });
     } catch (e) {
         console.error(e);
+        if (div && !streamed) div.remove();
         appendLog("Request failed.", 'error');
-        return;
     }
+}
 
-    appendLog(data.response, 'ai');
-    appendUsage(data.usage);
-    if (data.state) updateHUD(data.state);
+async function readEvents(res, onEvent) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const {value, done} = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, {stream: true});
+
+        let idx;
+        while ((idx = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, idx);
+            buffer = buffer.slice(idx + 2);
+
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
 }
 
 function appendLog(html, type) {
@@ -82,6 +119,11 @@ function appendLog(html, type) {
     div.className = `msg ${type}`;
     div.innerHTML = marked.parse(html || "");
     log.appendChild(div);
+    scrollTerminal();
+    return div;
+}
+
+function scrollTerminal() {
     document.getElementById('terminal').scrollTop = 99999;
 }
 
@@ -90,14 +132,21 @@ function appendUsage(usage) {
 }
 
 function updateHUD(state) {
-    document.getElementById('stat-loc').textContent = state.location;
-    document.getElementById('stat-exits').textContent = state.exits.join(', ').toUpperCase();
-    const ul = document.getElementById('stat-inv');
-    ul.innerHTML = '';
-    state.inventory.forEach(i => {
-        const li = document.createElement('li');
-        li.textContent = i;
-        ul.appendChild(li);
-    });
+    // A delta carries only the fields that changed since the version we sent; anything else is a full state.
+    const changed = state.delta ? state : {location: '', exits: [], inventory: [], ...state};
+    hudState = state.delta ? {...hudState, ...state} : state;
+    delete hudState.delta;
+
+    if ('location' in changed) document.getElementById('stat-loc').textContent = changed.location;
+    if ('exits' in changed) document.getElementById('stat-exits').textContent = changed.exits.join(', ').toUpperCase();
+    if ('inventory' in changed) {
+        const ul = document.getElementById('stat-inv');
+        ul.innerHTML = '';
+        changed.inventory.forEach(i => {
+            const li = document.createElement('li');
+            li.textContent = i;
+            ul.appendChild(li);
+        });
+    }
 }
 if (typeof marked === 'undefined') window.marked = { parse: (t) => t };
@@ -0,0 +1,134 @@
+import atexit
+import contextlib
+import datetime
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+TELEMETRY_FILE = os.environ.get("FROTZ_TELEMETRY_FILE", "telemetry.jsonl")
+# off: nothing; meta: timings/usage only; sampled: plus full prompt/response for a fraction of calls;
+# full: prompt/response for every call. FROTZ_TELEMETRY_CAPTURE_ROLES limits capture to some roles.
+TELEMETRY_LEVEL = os.environ.get("FROTZ_TELEMETRY_LEVEL", "meta")
+TELEMETRY_SAMPLE_RATE = float(os.environ.get("FROTZ_TELEMETRY_SAMPLE_RATE", "0.05"))
+TELEMETRY_CAPTURE_ROLES = {r for r in os.environ.get("FROTZ_TELEMETRY_CAPTURE_ROLES", "").upper().split(",") if r}
+TELEMETRY_MAX_BYTES = int(os.environ.get("FROTZ_TELEMETRY_MAX_BYTES", str(10 * 1024 * 1024)))
+TELEMETRY_MAX_AGE = int(os.environ.get("FROTZ_TELEMETRY_MAX_AGE", str(24 * 60 * 60)))
+TELEMETRY_BACKUPS = int(os.environ.get("FROTZ_TELEMETRY_BACKUPS", "5"))
+TELEMETRY_QUEUE_SIZE = 10000
+
+LEVELS = ("off", "meta", "sampled", "full")
+
+
+class TelemetrySink:
+    def __init__(self, path=TELEMETRY_FILE, level=TELEMETRY_LEVEL, sample_rate=TELEMETRY_SAMPLE_RATE,
+                 capture_roles=None, max_bytes=TELEMETRY_MAX_BYTES, max_age=TELEMETRY_MAX_AGE,
+                 backups=TELEMETRY_BACKUPS):
+        self.path = path
+        self.level = level if level in LEVELS else "meta"
+        self.sample_rate = sample_rate
+        self.capture_roles = TELEMETRY_CAPTURE_ROLES if capture_roles is None else set(capture_roles)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._opened_at = None
+
+    def wants_capture(self, role):
+        if self.level not in ("sampled", "full"):
+            return False
+        if self.capture_roles and role not in self.capture_roles:
+            return False
+        return self.level == "full" or random.random() < self.sample_rate
+
+    def emit(self, record, capture=None):
+        # Never blocks the request path: a full queue drops the record and counts it.
+        if self.level == "off":
+            return
+        record = dict(record)
+        record.setdefault("ts", datetime.datetime.now().isoformat(timespec='milliseconds'))
+        if capture:
+            record.update(capture)
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        if self._thread is None:
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Telemetry must never take the game down; lose the batch instead.
+            with contextlib.suppress(Exception):
+                self._write(batch)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, batch):
+        lines = [json.dumps(r, separators=(',', ':'), default=str) for r in batch if not isinstance(r, threading.Event)]
+        if not lines:
+            if self._file:
+                self._file.flush()
+            return
+        self._maybe_rotate()
+        if self._file is None:
+            # Held open across batches until rotation closes it, so no context manager.
+            self._file = open(self.path, 'a', encoding='utf-8')  # noqa: SIM115
+            self._opened_at = time.time()
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    def _maybe_rotate(self):
+        if self._file is None:
+            if not os.path.exists(self.path):
+                return
+            size = os.path.getsize(self.path)
+            age = time.time() - os.path.getmtime(self.path) if size else 0
+        else:
+            size = self._file.tell()
+            age = time.time() - self._opened_at
+        if size < self.max_bytes and age < self.max_age:
+            return
+
+        if self._file:
+            self._file.close()
+            self._file = None
+        for n in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{n}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
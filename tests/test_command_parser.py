@@ -0,0 +1,56 @@
+import pytest
+
+from command_parser import execute_command, parse_command
+from world_manager import WorldManager
+
+GENESIS = {
+    "intro_text": "You wake.",
+    "starting_room": {
+        "name": "Study",
+        "description": "A cluttered study.",
+        "items": [
+            {"id": "brass_key", "name": "brass key", "aliases": ["key"], "description": "Shiny."},
+            {"id": "rusty_key", "name": "rusty key", "aliases": ["key"], "description": "Old."},
+            {"id": "cellphone", "name": "cellphone", "aliases": [], "description": "Cracked."},
+        ],
+        "new_exits": [],
+    },
+    "starting_inventory": [
+        {"id": "pajamas", "name": "your pajamas", "aliases": ["pajamas"], "description": "Striped."},
+        {"id": "ring", "name": "silver ring", "aliases": ["ring"], "description": "Plain."},
+    ],
+}
+
+
+@pytest.fixture
+def world(tmp_path):
+    world = WorldManager(str(tmp_path / "world.json"))
+    world.initialize_world(GENESIS)
+    return world
+
+
+def run(world, text):
+    verb, noun = parse_command(text)
+    return execute_command(world, verb, noun)
+
+
+def test_ambiguous_noun_goes_to_the_dm(world):
+    assert run(world, "take key") is None
+    assert world.data['player']['inventory'] == ["pajamas", "ring"]
+
+
+def test_specific_noun_is_handled_locally(world):
+    assert run(world, "take rusty key") == "Taken."
+    assert "rusty_key" in world.data['player']['inventory']
+    assert run(world, "take key") == "Taken."
+    assert "brass_key" in world.data['player']['inventory']
+
+
+def test_substring_fallback_finds_item(world):
+    assert run(world, "take phone") == "Taken."
+
+
+def test_wear_keeps_the_item_name_and_skips_non_garments(world):
+    assert run(world, "wear pajamas") == "You put on your pajamas."
+    assert run(world, "take off pajamas") == "You take off your pajamas."
+    assert run(world, "wear ring") is None
@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+
+from journal import WorldJournal
+
+
+def new_journal(tmp_path, **kw):
+    journal = WorldJournal(str(tmp_path / "world.json"), **kw)
+    journal.write_snapshot({"rooms": {"r1": {"name": "Hall"}}, "player": {"current_room": "r1"}})
+    return journal
+
+
+def test_replays_deltas_over_snapshot(tmp_path):
+    journal = new_journal(tmp_path)
+    journal.append({"rooms": {"r2": {"name": "Attic"}}})
+    journal.append({"player": {"current_room": "r2"}})
+
+    data = WorldJournal(journal.snapshot_file).load()
+    assert set(data["rooms"]) == {"r1", "r2"}
+    assert data["player"]["current_room"] == "r2"
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    journal = new_journal(tmp_path)
+    journal.append({"player": {"current_room": "r2"}})
+    with open(journal.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"player": {"current_ro')  # crash mid-write
+
+    data = WorldJournal(journal.snapshot_file).load()
+    assert data["player"]["current_room"] == "r2"
+
+
+def test_append_after_torn_line_survives_reload(tmp_path):
+    journal = new_journal(tmp_path)
+    with open(journal.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"player": {"current_ro')
+
+    reopened = WorldJournal(journal.snapshot_file)
+    reopened.load()
+    reopened.append({"player": {"current_room": "r3"}})
+
+    assert WorldJournal(journal.snapshot_file).load()["player"]["current_room"] == "r3"
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    journal = new_journal(tmp_path, compact_every=2)
+    journal.append({"rooms": {"r2": {"name": "Attic"}}})
+    journal.append({"rooms": {"r3": {"name": "Cellar"}}})
+    journal.compact(wait=True)
+
+    assert not os.path.exists(journal.journal_file)
+    assert not os.path.exists(journal.compacting_file)
+    with open(journal.snapshot_file, encoding="utf-8") as f:
+        assert set(json.load(f)["rooms"]) == {"r1", "r2", "r3"}
+
+
+def test_crash_during_fold_replays_compacting_log_first(tmp_path):
+    journal = new_journal(tmp_path)
+    journal.append({"player": {"current_room": "r2"}})
+    os.replace(journal.journal_file, journal.compacting_file)  # rotated, then the fold died
+    journal.append({"player": {"current_room": "r3"}})
+
+    reopened = WorldJournal(journal.snapshot_file)
+    assert reopened.load()["player"]["current_room"] == "r3"
+    reopened.compact(wait=True)
+    assert not os.path.exists(journal.compacting_file)
+    assert WorldJournal(journal.snapshot_file).load()["player"]["current_room"] == "r3"
+
+
+def test_failed_fold_keeps_compacting_log(tmp_path, monkeypatch):
+    journal = new_journal(tmp_path)
+    journal.append({"player": {"current_room": "r2"}})
+
+    def crash(_text):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(journal, "_write_snapshot_file", crash)
+    assert journal.compact(wait=True)
+    assert os.path.exists(journal.compacting_file)
+    journal.append({"rooms": {"r2": {"name": "Attic"}}})
+
+    data = WorldJournal(journal.snapshot_file).load()
+    assert data["player"]["current_room"] == "r2"
+    assert "r2" in data["rooms"]
+
+
+@pytest.mark.parametrize("missing", ["snapshot", "all"])
+def test_load_without_snapshot_is_a_new_world(tmp_path, missing):
+    journal = new_journal(tmp_path)
+    journal.append({"player": {"current_room": "r2"}})
+    os.remove(journal.snapshot_file)
+    if missing == "all":
+        os.remove(journal.journal_file)
+    assert WorldJournal(journal.snapshot_file).load() is None
@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+
+import pytest
+
+import llm_interface
+from llm_hedge import DeadlineExceeded, Hedger
+from llm_interface import DEADLINE_FALLBACKS, LLMInterface
+from llm_transport import Cancellation, LLMTransport, RequestCancelled
+from metrics import LLM_DEADLINE_MISSES, LLM_HEDGE_WINS, LLM_REQUESTS
+from model_router import ModelRouter
+from narrative_stream import NarrativeStream
+from telemetry import TelemetrySink
+
+
+def hedger(deadline=5.0, hedge=False, key="DM"):
+    h = Hedger(deadlines={"DM": deadline}, hedge_roles={"DM"} if hedge else set(), min_delay=0.05, min_samples=1)
+    if hedge:
+        h.latency.observe(key, 0.01)
+    return h
+
+
+def test_deadline_raises_and_cancels_the_attempt():
+    cancels = []
+
+    def attempt(cancel):
+        cancels.append(cancel)
+        cancel.wait(5)
+        return "late"
+
+    misses = LLM_DEADLINE_MISSES.value(role="DM")
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        hedger(deadline=0.1).run("DM", attempt)
+    assert time.monotonic() - started < 1
+    assert cancels[0].is_set()
+    assert cancels[0].remaining() <= 0
+    assert LLM_DEADLINE_MISSES.value(role="DM") == misses + 1
+
+
+def test_hedge_wins_and_loser_result_is_discarded():
+    calls = []
+    discarded = threading.Event()
+
+    def attempt(cancel):
+        calls.append(cancel)
+        if len(calls) == 1:
+            cancel.wait(5)  # the slow first attempt, released when the hedge wins
+            return "slow"
+        return "fast"
+
+    wins = LLM_HEDGE_WINS.value(role="DM")
+    result = hedger(hedge=True).run("DM", attempt, discard=lambda r: discarded.set() if r == "slow" else None)
+    assert result == "fast"
+    assert len(calls) == 2
+    assert calls[0].is_set()
+    assert discarded.wait(1)
+    assert LLM_HEDGE_WINS.value(role="DM") == wins + 1
+
+
+def test_every_attempt_failing_raises_the_failure():
+    def attempt(_cancel):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        hedger().run("DM", attempt)
+
+
+def test_cancellation_bounds_transport_timeouts_and_closes_response():
+    transport = LLMTransport(api_url="http://127.0.0.1:9/", connect_timeout=5, read_timeout=90)
+    connect, read = transport._timeout(Cancellation(time.monotonic() + 1.0))
+    assert connect <= 1.0 and read <= 1.0
+    with pytest.raises(RequestCancelled):
+        transport._timeout(Cancellation(time.monotonic() - 0.1))
+
+    class Response:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    cancel = Cancellation()
+    resp = Response()
+    cancel.attach(resp)
+    cancel.set()
+    assert resp.closed
+    with pytest.raises(RequestCancelled):
+        cancel.attach(Response())
+
+
+class SlowThenFastTransport:
+    def __init__(self):
+        self.calls = 0
+
+    def post_json(self, _payload, cancel=None, **_kw):
+        self.calls += 1
+        if self.calls == 1:
+            cancel.wait(5)
+        content = json.dumps({"narrative": f"call {self.calls}"})
+        return {"choices": [{"message": {"content": content}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}}
+
+
+@pytest.fixture
+def interface(monkeypatch):
+    monkeypatch.setattr(llm_interface, "MISTRAL_API_KEY", "test")
+
+    def build(transport, deadline=5.0, hedge=False):
+        router = ModelRouter(routes={"DM": "large"})
+        return LLMInterface(transport=transport, telemetry=TelemetrySink(level="off"), router=router,
+                            hedger=hedger(deadline, hedge, key=f"DM:{router.models['large']}"))
+    return build
+
+
+def test_deadline_returns_in_character_fallback(interface):
+    class Stuck:
+        def post_json(self, _payload, cancel=None, **_kw):
+            cancel.wait(5)
+            raise RequestCancelled()
+
+    data = interface(Stuck(), deadline=0.1)._req("system", "user", "DM")
+    assert data["deadline"] and data["error"]
+    assert data["narrative"] == DEADLINE_FALLBACKS["DM"]
+
+
+def test_losing_hedge_attempt_is_still_billed(interface):
+    ai = interface(SlowThenFastTransport(), hedge=True)
+    before = LLM_REQUESTS.value(role="DM", model=ai.model, result="discarded")
+
+    assert ai._req("system", "user", "DM", ai.model)["narrative"] == "call 2"
+    deadline = time.monotonic() + 1
+    while LLM_REQUESTS.value(role="DM", model=ai.model, result="discarded") == before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert LLM_REQUESTS.value(role="DM", model=ai.model, result="discarded") == before + 1
+
+
+def feed_all(chunks):
+    stream = NarrativeStream()
+    return "".join(stream.feed(c) for c in chunks), stream
+
+
+def test_narrative_stream_handles_escape_split_across_chunks():
+    text, stream = feed_all(['{"narr', 'ative": "He said \\', '"hi\\', '" and\\', 'nleft', '", "room_add": []}'])
+    assert text == 'He said "hi" and\nleft'
+    assert stream.done
+
+
+def test_narrative_stream_joins_surrogate_pair_split_across_chunks():
+    text, _ = feed_all(['{"narrative": "a \\ud83d', '\\ude00 b"}'])
+    assert text == "a \U0001F600 b"
+
+
+def test_narrative_stream_waits_for_partial_unicode_escape():
+    text, _ = feed_all(['{"narrative": "caf\\u00', 'e9"}'])
+    assert text == "café"
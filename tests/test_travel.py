@@ -0,0 +1,46 @@
+import pytest
+
+from world_manager import WorldManager
+
+GENESIS = {
+    "intro_text": "You wake.",
+    "starting_room": {"name": "Bedroom", "description": "A small bedroom.", "items": [], "new_exits": ["north"]},
+    "starting_inventory": [],
+}
+
+
+@pytest.fixture(params=[".json", ".db"])
+def world(request, tmp_path):
+    world = WorldManager(str(tmp_path / f"world{request.param}"))
+    world.initialize_world(GENESIS)
+    return world
+
+
+def test_travel_right_after_genesis(world):
+    hallway = world.get_current_room()['exits']['north']
+    world.create_rooms_from_stubs({hallway: {"name": "Hallway", "description": "A long hallway.", "new_exits": []}})
+    assert world.move_player("n")[0] == "ok"
+
+    status, walked = world.travel("bedroom")
+    assert status == "ok"
+    assert [room['name'] for room in walked] == ["Bedroom"]
+    assert world.data['player']['current_room'] == "room_start"
+    assert world.travel("hallway")[0] == "ok"
+
+
+def test_unknown_destination_leaves_graph_usable(world):
+    assert world.travel("the moon") == ("unknown", [])
+    assert world.travel("bedroom") == ("here", [])
+
+
+def test_failed_graph_build_is_retried(world, monkeypatch):
+    rooms = world.data['rooms']
+
+    def broken():
+        raise RuntimeError("disk went away")
+
+    monkeypatch.setattr(rooms, "adjacency", broken, raising=False)
+    with pytest.raises(RuntimeError):
+        world.travel("bedroom")
+    monkeypatch.undo()
+    assert world.travel("bedroom") == ("here", [])
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from world_db import LazyTable, WorldDatabase
+
+
+def sample_world():
+    return {
+        "narrative_thread": "The house is waking up.",
+        "rooms": {
+            "r1": {"id": "r1", "name": "Hall", "description": "A hall.", "base_description": "A hall.",
+                   "exits": {"north": "r2"}, "items": ["key"], "characters": [], "visited": True, "smell": "dust"},
+            "r2": {"id": "r2", "name": "Unknown", "description": None, "base_description": None,
+                   "exits": {"south": "r1"}, "items": [], "characters": [], "visited": False},
+        },
+        "items": {
+            "key": {"id": "key", "name": "brass key", "aliases": ["key"], "description": "Small.",
+                    "carryable": True, "visible": True},
+            "coat": {"id": "coat", "name": "your coat", "aliases": ["coat"], "description": "Warm.",
+                     "carryable": True, "visible": True},
+        },
+        "characters": {},
+        "player": {"current_room": "r1", "description": "You.", "inventory": [], "worn": ["coat"]},
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "world.db")
+
+
+def reopen(path):
+    db = WorldDatabase(path)
+    return db, db.load()
+
+
+def test_round_trip(db_path):
+    WorldDatabase(db_path).write_snapshot(sample_world())
+    _, data = reopen(db_path)
+
+    expected = sample_world()
+    assert data["narrative_thread"] == expected["narrative_thread"]
+    assert data["player"] == expected["player"]
+    assert data["rooms"]["r1"] == expected["rooms"]["r1"]
+    assert data["rooms"]["r2"] == expected["rooms"]["r2"]
+    assert data["items"]["coat"] == expected["items"]["coat"]
+
+
+def test_append_writes_only_the_delta(db_path):
+    db = WorldDatabase(db_path)
+    db.write_snapshot(sample_world())
+    db.append({"rooms": {"r2": dict(sample_world()["rooms"]["r2"], name="Attic", description="Dusty.")},
+               "player": {"current_room": "r2", "description": "You.", "inventory": ["key"], "worn": ["coat"]},
+               "narrative_thread": "Upstairs now."})
+
+    _, data = reopen(db_path)
+    assert data["rooms"]["r2"]["name"] == "Attic"
+    assert data["rooms"]["r1"]["name"] == "Hall"
+    assert data["player"]["inventory"] == ["key"]
+    assert data["narrative_thread"] == "Upstairs now."
+
+
+def test_reset_replaces_every_table(db_path):
+    db = WorldDatabase(db_path)
+    db.write_snapshot(sample_world())
+    db.write_snapshot({"rooms": {"r9": {"id": "r9", "name": "Field", "description": "Grass.", "exits": {},
+                                        "items": [], "characters": []}},
+                       "items": {}, "characters": {}, "player": {"current_room": "r9", "inventory": [], "worn": []}})
+
+    _, data = reopen(db_path)
+    assert list(data["rooms"]) == ["r9"]
+    assert "r1" not in data["rooms"]
+    assert list(data["items"]) == []
+    assert "narrative_thread" not in data
+
+
+def test_rows_load_lazily_by_id(db_path):
+    WorldDatabase(db_path).write_snapshot(sample_world())
+    _, data = reopen(db_path)
+    rooms = data["rooms"]
+
+    assert isinstance(rooms, LazyTable)
+    assert rooms.loaded() == []
+    assert rooms["r1"]["name"] == "Hall"
+    assert [r["id"] for r in rooms.loaded()] == ["r1"]
+    assert rooms["r1"] is rooms["r1"]
+    assert "r404" not in rooms
+    assert [r["id"] for r in rooms.loaded()] == ["r1"]
+
+
+def test_deleted_rows_are_removed_on_append(db_path):
+    WorldDatabase(db_path).write_snapshot(sample_world())
+    db, data = reopen(db_path)
+    del data["items"]["key"]
+    db.append({})
+
+    _, data = reopen(db_path)
+    assert "key" not in data["items"]
+    assert "coat" in data["items"]
+
+
+def test_adjacency_reads_columns_and_prefers_loaded_rows(db_path):
+    WorldDatabase(db_path).write_snapshot(sample_world())
+    _, data = reopen(db_path)
+    rooms = data["rooms"]
+
+    graph = {rid: (exits, name, visited) for rid, exits, name, visited in rooms.adjacency()}
+    assert graph["r1"] == ({"north": "r2"}, "Hall", True)
+    assert graph["r2"] == ({"south": "r1"}, "Unknown", False)
+    assert rooms.loaded() == []
+
+    rooms["r2"]["exits"]["east"] = "r3"  # unsaved change on a loaded row
+    graph = {rid: exits for rid, exits, _, _ in rooms.adjacency()}
+    assert graph["r2"] == {"south": "r1", "east": "r3"}
+
+
+def test_imports_legacy_json_save_once(tmp_path, db_path):
+    legacy = tmp_path / "world.json"
+    legacy.write_text(json.dumps(sample_world()), encoding="utf-8")
+
+    _, data = reopen(db_path)
+    assert data["rooms"]["r1"]["name"] == "Hall"
+    assert not legacy.exists()
+    assert (tmp_path / "world.json.imported").exists()
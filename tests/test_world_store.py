@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+import world_store
+from world_store import WorldStore
+
+GENESIS = {
+    "intro_text": "You wake.",
+    "starting_room": {"name": "Bedroom", "description": "A small bedroom.", "items": [], "new_exits": ["north"]},
+    "starting_inventory": [],
+}
+
+
+def sid(n):
+    return f"{n:032x}"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(world_store, "EVICT_GRACE_SECONDS", 0)
+    monkeypatch.setattr(world_store, "STORAGE_BACKEND", "sqlite")
+    return WorldStore(save_dir=str(tmp_path), max_worlds=1, idle_seconds=3600, sweep_seconds=0)
+
+
+def test_concurrent_first_requests_share_one_load(store, monkeypatch):
+    loads = []
+    release = threading.Event()
+    real = world_store.WorldManager
+
+    def slow_load(path):
+        loads.append(path)
+        release.wait(5)
+        return real(path)
+
+    monkeypatch.setattr(world_store, "WorldManager", slow_load)
+    worlds = []
+    threads = [threading.Thread(target=lambda: worlds.append(store.get(sid(1)))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(loads) == 1
+    assert len(worlds) == 4 and all(w is worlds[0] for w in worlds)
+
+
+def test_busy_world_is_not_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(world_store, "EVICT_GRACE_SECONDS", 0)
+    pending = set()
+    store = WorldStore(save_dir=str(tmp_path), max_worlds=1, sweep_seconds=0, busy=lambda w: w in pending)
+    first = store.get(sid(1))
+    pending.add(first)
+
+    store.get(sid(2))
+    assert store.get(sid(1)) is first
+
+    pending.clear()
+    store.get(sid(2))
+    assert store.get(sid(1)) is not first
+
+
+def test_eviction_saves_and_closes_the_database(store):
+    world = store.get(sid(1))
+    world.initialize_world(GENESIS)
+    assert world.storage._conn is not None
+
+    store.get(sid(2))
+    assert world.storage._conn is None
+    assert store.get(sid(1)).get_current_room()['name'] == "Bedroom"
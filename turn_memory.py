@@ -0,0 +1,162 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+MEMORY_SUFFIX = ".memory"
+MEMORY_TOP_K = int(os.environ.get("FROTZ_MEMORY_TOP_K", "4"))
+MEMORY_ENABLED = os.environ.get("FROTZ_MEMORY", "1") == "1"
+NARRATIVE_LIMIT = 220
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+STOP_WORDS = {
+    "the", "a", "an", "some", "my", "your", "you", "at", "on", "in", "to", "with", "of", "and", "from",
+    "under", "into", "is", "are", "was", "it", "its", "it's", "this", "that", "for", "as", "but", "or",
+    "be", "by", "has", "have", "not", "there", "here", "up", "out", "off", "s",
+}
+
+
+def terms(text):
+    out = []
+    for word in WORD_RE.findall((text or '').lower()):
+        if word in STOP_WORDS:
+            continue
+        # Crude plural folding so "keys" finds "key" without pulling in a stemmer.
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        out.append(word)
+    return out
+
+
+def describe_changes(outcome, item_name):
+    changes = []
+    verbs = (
+        ("inventory_add", "took"), ("inventory_remove", "dropped"), ("room_add", "appeared"),
+        ("room_remove", "gone"), ("wear_add", "put on"), ("wear_remove", "took off"),
+    )
+    for key, verb in verbs:
+        names = [item_name(iid) for iid in outcome.get(key, [])]
+        if names:
+            changes.append(f"{verb}: {', '.join(names)}")
+    for iid, desc in outcome.get('update_description', {}).items():
+        changes.append(f"{item_name(iid)} now: {desc[:120]}")
+    for iid, visible in outcome.get('item_visibility_update', {}).items():
+        changes.append(f"{'revealed' if visible else 'hid'}: {item_name(iid)}")
+    return "; ".join(changes)
+
+
+# Per-world long-term memory: one event per turn (input, narrative, state changes), appended to
+# `<save>.memory` and ranked with BM25 against the current action and room. The index is built the
+# first time it is needed and kept incrementally, so prompts carry only the top-k relevant events
+# however long the game runs.
+class TurnMemory:
+    def __init__(self, path, top_k=MEMORY_TOP_K, enabled=MEMORY_ENABLED):
+        self.path = path
+        self.top_k = top_k
+        self.enabled = enabled
+        self.events = []
+        self._postings = defaultdict(dict)  # term -> {event index: term frequency}
+        self._lengths = []
+        self._total_length = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            event = dict(event, turn=len(self.events) + 1)
+            line = json.dumps(event, separators=(',', ':'))
+            save_dir = os.path.dirname(self.path)
+            if save_dir and not os.path.exists(save_dir):
+                os.makedirs(save_dir)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+            self._index(event)
+
+    def search(self, query, k=None):
+        k = self.top_k if k is None else k
+        if not self.enabled or k <= 0:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            n = len(self.events)
+            if not n:
+                return []
+            avg_length = self._total_length / n
+            scores = defaultdict(float)
+            for term in set(terms(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc] / avg_length)
+                    scores[doc] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            # Best first; among equal scores the more recent event wins.
+            best = sorted(scores, key=lambda doc: (scores[doc], doc), reverse=True)[:k]
+            return [self.events[doc] for doc in best]
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+            self._postings.clear()
+            self._lengths = []
+            self._total_length = 0
+            self._loaded = True
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._index(json.loads(line))
+                except ValueError:
+                    continue
+
+    def _index(self, event):
+        doc = len(self.events)
+        self.events.append(event)
+        words = terms(" ".join((event.get('room', ''), event.get('input', ''),
+                                event.get('narrative', ''), event.get('changes', ''))))
+        for term, tf in Counter(words).items():
+            self._postings[term][doc] = tf
+        self._lengths.append(len(words))
+        self._total_length += len(words)
+
+
+def make_event(room, user_input, outcome, item_name):
+    narrative = outcome.get('narrative') or ''
+    if len(narrative) > NARRATIVE_LIMIT:
+        narrative = narrative[:NARRATIVE_LIMIT].rsplit(' ', 1)[0] + "…"
+    return {
+        "room_id": room['id'] if room else None,
+        "room": room.get('name', '') if room else '',
+        "input": user_input,
+        "narrative": narrative,
+        "changes": describe_changes(outcome, item_name),
+    }
+
+
+def render_events(events):
+    lines = []
+    for event in sorted(events, key=lambda e: e.get('turn', 0)):
+        line = f"[turn {event.get('turn')}, {event.get('room')}] > {event.get('input')}: {event.get('narrative')}"
+        if event.get('changes'):
+            line += f" ({event['changes']})"
+        lines.append(line)
+    return "\n".join(lines)
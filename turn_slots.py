@@ -0,0 +1,34 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from metrics import TURNS_SHED
+
+# AI turns allowed to wait on the model at once; the remaining server threads stay free for local
+# commands. Keep it below FROTZ_THREADS (gunicorn.conf.py) and at most LLM_POOL_SIZE.
+AI_TURN_SLOTS = int(os.environ.get("FROTZ_AI_TURN_SLOTS", "48"))
+AI_SLOT_WAIT = float(os.environ.get("FROTZ_AI_SLOT_WAIT", "2.0"))
+BUSY_RETRY_AFTER = 2
+
+
+class SlotsExhausted(Exception):
+    pass
+
+
+class TurnSlots:
+    def __init__(self, slots=AI_TURN_SLOTS, wait=AI_SLOT_WAIT):
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(slots) if slots > 0 else None
+
+    @contextmanager
+    def hold(self, path):
+        if self._slots is None:
+            yield
+            return
+        if not self._slots.acquire(timeout=self.wait):
+            TURNS_SHED.inc(path=path)
+            raise SlotsExhausted(path)
+        try:
+            yield
+        finally:
+            self._slots.release()
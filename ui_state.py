@@ -0,0 +1,50 @@
+import os
+import threading
+from collections import OrderedDict
+
+# How many past HUD states per world a client can send a delta against; older versions get the full state.
+UI_STATE_HISTORY = int(os.environ.get("FROTZ_UI_STATE_HISTORY", "16"))
+
+
+def build_state(world):
+    room = world.get_current_room()
+    return {
+        "location": room.get('name', 'Unknown'),
+        "inventory": world.item_names(world.data['player']['inventory']),
+        "exits": list(room.get('exits', {}).keys()),
+    }
+
+
+# Versioned HUD state for one world. The world's state token changes on every mutation; the state is
+# built once per token, and a client that reports the token it last saw gets only the fields that
+# differ (`"delta": true`), or nothing but the token when the world hasn't moved.
+class UIState:
+    def __init__(self, history=UI_STATE_HISTORY):
+        self.history = max(1, history)
+        self._states = OrderedDict()  # state token -> HUD state, oldest first
+        self._lock = threading.Lock()
+
+    def current(self, world):
+        token = world.state_token()
+        with self._lock:
+            state = self._states.get(token)
+        if state is None:
+            state = build_state(world)
+            with self._lock:
+                self._states[token] = state
+                while len(self._states) > self.history:
+                    self._states.popitem(last=False)
+        return token, state
+
+    def for_client(self, world, known=None):
+        token, state = self.current(world)
+        with self._lock:
+            old = self._states.get(known) if known else None
+        if old is None:
+            return dict(state, version=token)
+        changed = {key: value for key, value in state.items() if old.get(key) != value}
+        return dict(changed, version=token, delta=True)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
@@ -0,0 +1,80 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from metrics import COMMANDS_DEDUPED, COMMANDS_REJECTED
+
+# Commands a world may have queued or running before new ones are refused.
+COMMAND_QUEUE_DEPTH = int(os.environ.get("FROTZ_COMMAND_QUEUE_DEPTH", "4"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class TurnAbandoned(Exception):
+    pass
+
+
+# Single-consumer command queue for one world. Requests take a ticket and run their own command
+# once every earlier ticket has finished, so turns never interleave and no thread is dedicated to
+# idle worlds. A command whose key is already queued or running joins that ticket and shares its
+# result. While tickets are queued the world defers saves; the last one out flushes a single write.
+# Nothing here holds world.lock while waiting, so prefetch jobs can still commit rooms a queued
+# command is waiting on.
+class WorldActor:
+    def __init__(self, world, max_depth=COMMAND_QUEUE_DEPTH):
+        self.world = world
+        self.max_depth = max(1, max_depth)
+        self._cond = threading.Condition()
+        self._queue = deque()  # tickets (Futures) in arrival order; the head is running
+        self._keys = {}  # command key -> ticket
+
+    def depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def enter(self, key):
+        # Returns (ticket, leader). A leader runs now and must call leave(); a follower waits on ticket.result().
+        with self._cond:
+            ticket = self._keys.get(key)
+            if ticket is not None:
+                COMMANDS_DEDUPED.inc()
+                return ticket, False
+            if len(self._queue) >= self.max_depth:
+                COMMANDS_REJECTED.inc()
+                raise QueueFull(f"{len(self._queue)} commands already queued")
+            ticket = Future()
+            self._queue.append(ticket)
+            self._keys[key] = ticket
+            if len(self._queue) == 1:
+                self.world.defer_saves()
+            while self._queue[0] is not ticket:
+                self._cond.wait()
+            return ticket, True
+
+    def leave(self, key, ticket):
+        if not ticket.done():
+            ticket.set_exception(TurnAbandoned(key))
+        with self._cond:
+            self._queue.remove(ticket)
+            if self._keys.get(key) is ticket:
+                del self._keys[key]
+            if not self._queue:
+                self.world.flush_saves()
+            self._cond.notify_all()
+
+    def run(self, key, fn):
+        ticket, leader = self.enter(key)
+        if not leader:
+            return ticket.result()
+        try:
+            result = fn()
+            ticket.set_result(result)
+            return result
+        except BaseException as e:
+            ticket.set_exception(e)
+            raise
+        finally:
+            self.leave(key, ticket)
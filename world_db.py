@@ -0,0 +1,374 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+from journal import FSYNC_JOURNAL, WorldJournal
+
+DB_SUFFIX = ".db"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    description TEXT,
+    base_description TEXT,
+    visited INTEGER,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS exits (
+    room_id TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    PRIMARY KEY (room_id, direction)
+);
+CREATE TABLE IF NOT EXISTS room_contents (
+    room_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    ref_id TEXT NOT NULL,
+    PRIMARY KEY (room_id, kind, position)
+);
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    description TEXT,
+    carryable INTEGER,
+    visible INTEGER,
+    aliases TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS characters (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    current_room TEXT,
+    description TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS player_items (
+    slot TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    PRIMARY KEY (slot, position)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+TABLES = ("rooms", "exits", "room_contents", "items", "characters", "player", "player_items", "meta")
+ROOM_COLUMNS = ("id", "name", "description", "base_description", "visited", "exits", "items", "characters")
+ITEM_COLUMNS = ("id", "name", "description", "carryable", "visible", "aliases")
+PLAYER_COLUMNS = ("current_room", "description", "inventory", "worn")
+LAZY_TABLES = ("rooms", "items", "characters")
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _extra(record, columns):
+    extra = {k: v for k, v in record.items() if k not in columns}
+    return _dumps(extra) if extra else None
+
+
+def _flag(value):
+    return None if value is None else int(bool(value))
+
+
+# Dict-like view of one record table. Records are read from the database the first time an id is
+# asked for and then kept, so callers can mutate them in place exactly as with the JSON save;
+# WorldManager's dirty set decides which of them get written back.
+class LazyTable(MutableMapping):
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.on_load = None
+        self._records = {}
+        self._absent = set()
+        self._deleted = set()
+
+    def __getitem__(self, key):
+        record = self._records.get(key)
+        if record is not None:
+            return record
+        if key in self._absent or key in self._deleted:
+            raise KeyError(key)
+        record = self.db.fetch(self.table, key)
+        if record is None:
+            self._absent.add(key)
+            raise KeyError(key)
+        if self.on_load:
+            record = self.on_load(record)
+        self._records[key] = record
+        return record
+
+    def __setitem__(self, key, record):
+        self._records[key] = record
+        self._absent.discard(key)
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._records.pop(key, None)
+        self._deleted.add(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        # Ids only; iterating values() would still load every record, so hot paths look up by id.
+        ids = [k for k in self.db.ids(self.table) if k not in self._deleted]
+        known = set(ids)
+        return iter(ids + [k for k in self._records if k not in known])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def loaded(self):
+        return list(self._records.values())
+
+    def adjacency(self):
+        # Rooms table only. Loaded rows win over the database, since they may hold unsaved changes.
+        rows = [row for row in self.db.adjacency() if row[0] not in self._records and row[0] not in self._deleted]
+        rows.extend((r['id'], r.get('exits', {}), r.get('name'), r.get('visited')) for r in self._records.values())
+        return rows
+
+    def take_deleted(self):
+        deleted, self._deleted = self._deleted, set()
+        return deleted
+
+
+# SQLite save for one world (WAL mode). Exposes the same load/append/write_snapshot/compact interface
+# as WorldJournal: `load` returns the top-level save dict with lazily loaded room/item/character
+# tables, and `append` writes one save_game delta (changed records only) in a single transaction.
+class WorldDatabase:
+    def __init__(self, db_file, fsync=FSYNC_JOURNAL):
+        self.db_file = db_file
+        self.legacy_file = os.path.splitext(db_file)[0] + ".json"
+        self.fsync = fsync
+        self.data = None
+        self._conn = None
+        self._lock = threading.RLock()
+
+    def load(self):
+        if not os.path.exists(self.db_file):
+            if not os.path.exists(self.legacy_file):
+                return None
+            # First open after switching backends: import the JSON save (snapshot + journal) once,
+            # then set the folded snapshot aside so a later reset does not bring it back.
+            journal = WorldJournal(self.legacy_file)
+            legacy = journal.load()
+            if legacy is None:
+                return None
+            self.write_snapshot(legacy)
+            journal.compact(wait=True)
+            os.replace(self.legacy_file, self.legacy_file + ".imported")
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT current_room, description, extra FROM player WHERE id = 1").fetchone()
+            if row is None:
+                return None
+            data = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+            data['player'] = self._player(conn, row)
+        for table in LAZY_TABLES:
+            data[table] = LazyTable(self, table)
+        self.data = data
+        return data
+
+    def append(self, delta):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for key, value in delta.items():
+                    if key == "rooms":
+                        for room in value.values():
+                            self._write_room(conn, room)
+                    elif key == "items":
+                        for item in value.values():
+                            self._write_item(conn, item)
+                    elif key == "characters":
+                        for cid, character in value.items():
+                            conn.execute("INSERT OR REPLACE INTO characters (id, data) VALUES (?, ?)",
+                                         (cid, _dumps(character)))
+                    elif key == "player":
+                        self._write_player(conn, value)
+                    else:
+                        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value)))
+                self._write_deletes(conn)
+
+    def write_snapshot(self, data):
+        with self._lock:
+            self.data = data
+            conn = self._connect()
+            with conn:
+                for table in TABLES:
+                    conn.execute(f"DELETE FROM {table}")
+                for room in data.get('rooms', {}).values():
+                    self._write_room(conn, room)
+                for item in data.get('items', {}).values():
+                    self._write_item(conn, item)
+                for cid, character in data.get('characters', {}).items():
+                    conn.execute("INSERT INTO characters (id, data) VALUES (?, ?)", (cid, _dumps(character)))
+                self._write_player(conn, data.get('player', {}))
+                for key, value in data.items():
+                    if key not in LAZY_TABLES and key != "player":
+                        conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, _dumps(value)))
+
+    def compact(self, wait=False):
+        # Folds the WAL back into the main file; `wait` also closes so the file can be moved whole.
+        with self._lock:
+            if self._conn is None:
+                return False
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if wait:
+                self.close()
+            return True
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def fetch(self, table, key):
+        with self._lock:
+            conn = self._connect()
+            if table == "rooms":
+                return self._read_room(conn, key)
+            if table == "items":
+                return self._read_item(conn, key)
+            row = conn.execute("SELECT data FROM characters WHERE id = ?", (key,)).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def adjacency(self):
+        # [(room id, exits, name, visited)] from two column scans, without building a record per room.
+        with self._lock:
+            conn = self._connect()
+            exits = {}
+            for rid, direction, target in conn.execute("SELECT room_id, direction, target_id FROM exits ORDER BY rowid"):
+                exits.setdefault(rid, {})[direction] = target
+            return [(rid, exits.get(rid, {}), name, bool(visited))
+                    for rid, name, visited in conn.execute("SELECT id, name, visited FROM rooms ORDER BY rowid")]
+
+    def ids(self, table):
+        with self._lock:
+            return [row[0] for row in self._connect().execute(f"SELECT id FROM {table} ORDER BY rowid")]
+
+    def _connect(self):
+        if self._conn is None:
+            save_dir = os.path.dirname(self.db_file)
+            if save_dir and not os.path.exists(save_dir):
+                os.makedirs(save_dir)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    def _read_room(self, conn, rid):
+        row = conn.execute(
+            "SELECT id, name, description, base_description, visited, extra FROM rooms WHERE id = ?", (rid,)
+        ).fetchone()
+        if row is None:
+            return None
+        room = {"id": row[0], "name": row[1], "description": row[2], "base_description": row[3]}
+        room['exits'] = dict(conn.execute(
+            "SELECT direction, target_id FROM exits WHERE room_id = ? ORDER BY rowid", (rid,)))
+        contents = {"item": [], "character": []}
+        for kind, ref_id in conn.execute(
+                "SELECT kind, ref_id FROM room_contents WHERE room_id = ? ORDER BY kind, position", (rid,)):
+            contents.setdefault(kind, []).append(ref_id)
+        room['items'] = contents['item']
+        room['characters'] = contents['character']
+        if row[4] is not None:
+            room['visited'] = bool(row[4])
+        if row[5]:
+            room.update(json.loads(row[5]))
+        return room
+
+    def _write_room(self, conn, room):
+        rid = room['id']
+        conn.execute(
+            "INSERT OR REPLACE INTO rooms (id, name, description, base_description, visited, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (rid, room.get('name'), room.get('description'), room.get('base_description'),
+             _flag(room.get('visited')), _extra(room, ROOM_COLUMNS))
+        )
+        conn.execute("DELETE FROM exits WHERE room_id = ?", (rid,))
+        conn.executemany("INSERT INTO exits (room_id, direction, target_id) VALUES (?, ?, ?)",
+                         [(rid, d, target) for d, target in room.get('exits', {}).items()])
+        conn.execute("DELETE FROM room_contents WHERE room_id = ?", (rid,))
+        conn.executemany(
+            "INSERT INTO room_contents (room_id, kind, position, ref_id) VALUES (?, ?, ?, ?)",
+            [(rid, "item", n, iid) for n, iid in enumerate(room.get('items', []))]
+            + [(rid, "character", n, cid) for n, cid in enumerate(room.get('characters', []))]
+        )
+
+    def _read_item(self, conn, iid):
+        row = conn.execute(
+            "SELECT id, name, description, carryable, visible, aliases, extra FROM items WHERE id = ?", (iid,)
+        ).fetchone()
+        if row is None:
+            return None
+        item = {"id": row[0], "name": row[1], "aliases": json.loads(row[5]) if row[5] else [], "description": row[2]}
+        if row[3] is not None:
+            item['carryable'] = bool(row[3])
+        if row[4] is not None:
+            item['visible'] = bool(row[4])
+        if row[6]:
+            item.update(json.loads(row[6]))
+        return item
+
+    def _write_item(self, conn, item):
+        conn.execute(
+            "INSERT OR REPLACE INTO items (id, name, description, carryable, visible, aliases, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (item['id'], item.get('name'), item.get('description'), _flag(item.get('carryable')),
+             _flag(item.get('visible')), _dumps(item.get('aliases', [])), _extra(item, ITEM_COLUMNS))
+        )
+
+    def _player(self, conn, row):
+        player = {"current_room": row[0], "description": row[1], "inventory": [], "worn": []}
+        for slot, item_id in conn.execute("SELECT slot, item_id FROM player_items ORDER BY slot, position"):
+            player.setdefault(slot, []).append(item_id)
+        if row[2]:
+            player.update(json.loads(row[2]))
+        return player
+
+    def _write_player(self, conn, player):
+        conn.execute(
+            "INSERT OR REPLACE INTO player (id, current_room, description, extra) VALUES (1, ?, ?, ?)",
+            (player.get('current_room'), player.get('description'), _extra(player, PLAYER_COLUMNS))
+        )
+        conn.execute("DELETE FROM player_items")
+        conn.executemany(
+            "INSERT INTO player_items (slot, position, item_id) VALUES (?, ?, ?)",
+            [(slot, n, iid) for slot in ("inventory", "worn") for n, iid in enumerate(player.get(slot, []))]
+        )
+
+    def _write_deletes(self, conn):
+        for table in LAZY_TABLES:
+            records = (self.data or {}).get(table)
+            if not isinstance(records, LazyTable):
+                continue
+            for key in records.take_deleted():
+                conn.execute(f"DELETE FROM {table} WHERE id = ?", (key,))
+                if table == "rooms":
+                    conn.execute("DELETE FROM exits WHERE room_id = ?", (key,))
+                    conn.execute("DELETE FROM room_contents WHERE room_id = ?", (key,))
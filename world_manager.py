@@ -1,9 +1,25 @@
-import json
 import os
 import shutil
+import threading
+import time
 import uuid
+from collections import defaultdict, deque
+
+from exit_graph import ExitGraph
+from item_index import ItemIndex
+from journal import WorldJournal
+from metrics import SAVES_COALESCED, WORLD_LOAD_SECONDS
+from outcome_cache import OutcomeCache
+from render_cache import RenderCache
+from turn_memory import MEMORY_SUFFIX, TurnMemory, make_event
+from ui_state import UIState
+from world_actor import WorldActor
+from world_db import DB_SUFFIX, LazyTable, WorldDatabase
+from world_model import Item, Player, RecordTable, Room, plain, to_save
 
 SAVE_FILE = "savegame.json"
+# Stamped into saves once ensure_schema has normalized every record; bump when the defaults change.
+WORLD_SCHEMA_VERSION = 1
 BACKUP_DIR = "backups"
 
 DIRECTION_MAP = {
@@ -12,32 +28,152 @@ DIRECTION_MAP = {
     "u": "up", "up": "up", "d": "down", "down": "down"
 }
 
+DEFAULT_SETTINGS = {
+    "outcome_cache": os.environ.get("FROTZ_OUTCOME_CACHE", "1") == "1",
+}
+
+
+def open_storage(save_file):
+    if save_file.endswith(DB_SUFFIX):
+        return WorldDatabase(save_file)
+    return WorldJournal(save_file)
+
+
+def normalize_room(room):
+    room = Room.from_dict(room)
+    room.setdefault('items', [])
+    room.setdefault('characters', [])
+    room.setdefault('exits', {})
+    room.setdefault('name', 'Unknown')
+    room.setdefault('description', '...')
+    room.setdefault('base_description', room.get('description', '...'))
+    return room
+
+
+def normalize_item(item):
+    item = Item.from_dict(item)
+    item.setdefault('id', f"item_{uuid.uuid4().hex[:6]}")
+    item.setdefault('name', 'thing')
+    item.setdefault('aliases', [])
+    item['aliases'] = [a.lower() for a in item.get('aliases', [])]
+    item.setdefault('description', '...')
+    item.setdefault('carryable', True)
+    item.setdefault('visible', True)
+    return item
+
 
 class WorldManager:
-    def __init__(self):
+    def __init__(self, save_file=SAVE_FILE):
+        self.save_file = save_file
+        self.storage = open_storage(save_file)
+        self.dirty = set()
+        self.lock = threading.RLock()
+        self.outcome_cache = OutcomeCache()
+        self.item_index = ItemIndex()
+        self.memory = TurnMemory(save_file + MEMORY_SUFFIX)
+        self.ui_state = UIState()
+        self.actor = WorldActor(self)
+        self.saves_deferred = False
+        # Bumped on every mutation; with the per-load epoch it is the state token behind HUD deltas and ETags.
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        # Per-record mutation counts: (kind, id) for one record, (kind, None) for any record of that kind.
+        self.versions = defaultdict(int)
+        self.render_cache = RenderCache()
+        self.exit_graph = ExitGraph()
+        started = time.perf_counter()
         self.data = self.load_game()
+        loaded = time.perf_counter()
+        WORLD_LOAD_SECONDS.observe(loaded - started, phase="load")
         if self.data:
-            self.ensure_schema()
+            if self.ensure_schema():
+                self.save_migration()
+            WORLD_LOAD_SECONDS.observe(time.perf_counter() - loaded, phase="migrate")
 
     def load_game(self):
-        if os.path.exists(SAVE_FILE):
-            try:
-                with open(SAVE_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception:
-                pass
-        return None
-
-    def save_game(self):
-        with open(SAVE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2)
+        try:
+            return self.storage.load()
+        except Exception:
+            return None
+
+    def mark_dirty(self, kind, key=None):
+        self.dirty.add((kind, key))
+        self.version += 1
+        self.versions[kind, key] += 1
+        if key is not None:
+            self.versions[kind, None] += 1
+
+    def state_token(self):
+        return f"{self.epoch}-{self.version}"
+
+    def save_game(self, force=False):
+        if not self.data or not self.dirty:
+            return
+        if self.saves_deferred and not force:
+            # Commands are queued on this world; the actor writes everything once the queue drains.
+            SAVES_COALESCED.inc()
+            return
+
+        delta = {}
+        for kind, key in self.dirty:
+            if key is None:
+                delta[kind] = plain(self.data.get(kind))
+                continue
+            record = self.data.get(kind, {}).get(key)
+            if record is not None:
+                delta.setdefault(kind, {})[key] = plain(record)
+        self.dirty.clear()
+        self.storage.append(delta)
+
+    def defer_saves(self):
+        with self.lock:
+            self.saves_deferred = True
+
+    def flush_saves(self):
+        with self.lock:
+            self.saves_deferred = False
+            self.save_game()
+
+    def save_snapshot(self):
+        self.version += 1
+        self.dirty.clear()
+        self.storage.write_snapshot(to_save(self.data))
+
+    def close(self):
+        with self.lock:
+            self.storage.close()
 
     def is_initialized(self):
         return self.data is not None
 
+    def footprint(self):
+        # Rooms and items held in memory; a lazily loaded table counts only the rows it has read.
+        if self.data is None:
+            return 0
+        tables = (self.data['rooms'], self.data['items'])
+        return sum(len(t.loaded()) if isinstance(t, LazyTable) else len(t) for t in tables)
+
+    def get_setting(self, name):
+        if not self.data:
+            return DEFAULT_SETTINGS.get(name)
+        return self.data.get('settings', {}).get(name, DEFAULT_SETTINGS.get(name))
+
     def ensure_schema(self):
+        # Returns True when the save was migrated just now and needs writing back with its stamp.
         if not self.data:
-            return
+            return False
+
+        if self.data.get('schema_version') == WORLD_SCHEMA_VERSION:
+            # Already normalized on disk: wrap the tables and convert records as they are first read.
+            self.data['player'] = Player.from_dict(self.data['player'])
+            for table, normalize, record_type in (('rooms', normalize_room, Room), ('items', normalize_item, Item)):
+                records = self.data.setdefault(table, {})
+                if hasattr(records, 'on_load'):
+                    # SQLite rows may come from an imported pre-stamp save, so they are still normalized on load.
+                    records.on_load = normalize
+                else:
+                    self.data[table] = RecordTable(records, record_type.from_dict)
+            return False
 
         player = self.data.setdefault('player', {})
         player.setdefault('inventory', [])
@@ -45,26 +181,34 @@ class WorldManager:
         player.setdefault('description', 'You look like someone trying to survive this strange place.')
         player.setdefault('aliases', ['me', 'myself', 'self', 'player'])
         player.setdefault('worn', [])
+        self.data['player'] = Player.from_dict(player)
 
         self.data.setdefault('characters', {})
         self.data.setdefault('narrative_thread', '')
-
-        for room in self.data.get('rooms', {}).values():
-            room.setdefault('items', [])
-            room.setdefault('characters', [])
-            room.setdefault('exits', {})
-            room.setdefault('name', 'Unknown')
-            room.setdefault('description', '...')
-            room.setdefault('base_description', room.get('description', '...'))
-
-        for item in self.data.get('items', {}).values():
-            item.setdefault('id', f"item_{uuid.uuid4().hex[:6]}")
-            item.setdefault('name', 'thing')
-            item.setdefault('aliases', [])
-            item['aliases'] = [a.lower() for a in item.get('aliases', [])]
-            item.setdefault('description', '...')
-            item.setdefault('carryable', True)
-            item.setdefault('visible', True)
+        settings = self.data.setdefault('settings', {})
+        for key, value in DEFAULT_SETTINGS.items():
+            settings.setdefault(key, value)
+
+        for table, normalize in (('rooms', normalize_room), ('items', normalize_item)):
+            records = self.data.setdefault(table, {})
+            if hasattr(records, 'on_load'):
+                # Lazily loaded (SQLite) tables: convert each record as it is first read.
+                records.on_load = normalize
+                for record in records.loaded():
+                    records[record['id']] = normalize(record)
+            else:
+                # Same table type as a stamped load, so code reading the tables sees one interface.
+                self.data[table] = RecordTable({key: normalize(record) for key, record in records.items()})
+        self.data['schema_version'] = WORLD_SCHEMA_VERSION
+        return True
+
+    def save_migration(self):
+        if hasattr(self.data['rooms'], 'on_load'):
+            # Lazily loaded tables normalize as they load; only the stamp is new.
+            self.mark_dirty('schema_version')
+            self.save_game()
+        else:
+            self.save_snapshot()
 
     def initialize_world(self, genesis_data):
         start_id = "room_start"
@@ -83,6 +227,7 @@ class WorldManager:
                     "visible": i.get('visible', True)
                 }
                 ids.append(iid)
+                self.item_index.add(items_db[iid])
             return ids
 
         room_item_ids = process_items(genesis_data['starting_room'].get('items', []))
@@ -132,14 +277,25 @@ class WorldManager:
             "items": items_db
         }
         self.ensure_schema()
-        self.save_game()
+        self.save_snapshot()
         return genesis_data.get('intro_text', 'Welcome.')
 
     def hard_reset(self):
-        if os.path.exists(SAVE_FILE):
+        self.save_game(force=True)
+        self.item_index.clear()
+        self.storage.compact(wait=True)
+        if os.path.exists(self.save_file):
             if not os.path.exists(BACKUP_DIR):
                 os.makedirs(BACKUP_DIR)
-            shutil.move(SAVE_FILE, os.path.join(BACKUP_DIR, f"save_{uuid.uuid4().hex[:8]}.json"))
+            suffix = os.path.splitext(self.save_file)[1] or ".json"
+            shutil.move(self.save_file, os.path.join(BACKUP_DIR, f"save_{uuid.uuid4().hex[:8]}{suffix}"))
+        self.dirty.clear()
+        self.outcome_cache.clear()
+        self.memory.clear()
+        self.ui_state.clear()
+        self.render_cache.clear()
+        self.exit_graph.clear()
+        self.version += 1
         self.data = None
 
     def get_current_room(self):
@@ -150,6 +306,10 @@ class WorldManager:
     def get_room(self, rid):
         return self.data['rooms'].get(rid) if self.data else None
 
+    def is_stub(self, rid):
+        room = self.get_room(rid)
+        return room is not None and room.get('description') is None
+
     def get_visible_room_items(self, room=None):
         room = room or self.get_current_room()
         if not room:
@@ -161,11 +321,29 @@ class WorldManager:
                 out.append(item)
         return out
 
+    def room_stamp(self, rid):
+        # Room text depends on the room and on the names/visibility of whatever items and characters it holds.
+        return self.versions['rooms', rid], self.versions['items', None], self.versions['characters', None]
+
+    def player_stamp(self):
+        return self.versions['player', None], self.versions['items', None]
+
     def describe_room(self, room=None):
         room = room or self.get_current_room()
         if not room:
             return "Unknown"
 
+        with self.lock:
+            composed = self.render_cache.get("room", room['id'], self.room_stamp(room['id']))
+            if composed is None:
+                composed = self._compose_room(room)
+                if room.get('description') != composed:
+                    room['description'] = composed
+                    self.mark_dirty('rooms', room['id'])
+                self.render_cache.put("room", room['id'], self.room_stamp(room['id']), composed)
+            return composed
+
+    def _compose_room(self, room):
         base = room.get('base_description') or room.get('description') or '...'
         visible_items = self.get_visible_room_items(room)
         item_line = ''
@@ -180,105 +358,184 @@ class WorldManager:
                 chars.append(char.get('name', 'someone'))
         char_line = f"\nOthers present: {', '.join(chars)}." if chars else ''
 
-        composed = f"{base}{item_line}{char_line}".strip()
-        room['description'] = composed
-        return composed
+        return f"{base}{item_line}{char_line}".strip()
 
     def describe_player(self):
-        player = self.data.get('player', {})
-        base = player.get('description', 'You look ordinary.')
-        worn_items = []
-        for iid in player.get('worn', []):
-            item = self.data['items'].get(iid)
-            if item:
-                worn_items.append(item['name'])
-
-        worn_text = ''
-        if worn_items:
-            worn_text = f"\n\nYou are wearing: {', '.join(worn_items)}."
-
-        inv_items = [self.data['items'][iid]['name'] for iid in player.get('inventory', []) if iid in self.data['items']]
-        inv_text = ''
-        if inv_items:
-            inv_text = f"\nYou are carrying: {', '.join(inv_items)}."
-
-        return f"{base}{worn_text}{inv_text}".strip()
-
-    def get_item_by_name(self, query):
-        query = query.lower().strip()
+        with self.lock:
+            text = self.render_cache.get("player", None, self.player_stamp())
+            if text is not None:
+                return text
+            player = self.data.get('player', {})
+            base = player.get('description', 'You look ordinary.')
+            worn_items = self.item_names(player.get('worn', []))
+            worn_text = ''
+            if worn_items:
+                worn_text = f"\n\nYou are wearing: {', '.join(worn_items)}."
+
+            inv_items = self.item_names(player.get('inventory', []))
+            inv_text = ''
+            if inv_items:
+                inv_text = f"\nYou are carrying: {', '.join(inv_items)}."
+
+            return self.render_cache.put("player", None, self.player_stamp(), f"{base}{worn_text}{inv_text}".strip())
+
+    def describe_inventory(self):
+        with self.lock:
+            text = self.render_cache.get("inventory", None, self.player_stamp())
+            if text is not None:
+                return text
+            player = self.data['player']
+            items = self.item_names(player['inventory'])
+            worn = self.item_names(player.get('worn', []))
+            output = []
+            if items:
+                output.append("**You are carrying:**\n" + "\n".join([f"- {name}" for name in items]))
+            if worn:
+                output.append("**You are wearing:**\n" + "\n".join([f"- {name}" for name in worn]))
+            text = "\n\n".join(output) or "You are not carrying anything."
+            return self.render_cache.put("inventory", None, self.player_stamp(), text)
+
+    def get_item_by_name(self, query, scope=('inventory', 'worn', 'room'), unique=False):
+        # `unique`: None when the name fits several items equally well, so the caller can defer to the DM.
+        items = self.data['items']
+        player = self.data['player']
         room = self.get_current_room()
-        candidates = self.data['player']['inventory'] + self.data['player'].get('worn', []) + room['items']
 
-        for iid in candidates:
-            item = self.data['items'].get(iid)
-            if not item:
-                continue
-            if (not item.get('visible', True)) and (iid not in self.data['player']['inventory']) and (iid not in self.data['player'].get('worn', [])):
-                continue
-            if query in item.get('aliases', []):
-                return item
-            if query == item['name'].lower():
-                return item
+        # Held items first, then whatever in the room is visible; earlier candidates win ties.
+        candidates = []
+        for where in scope:
+            if where == 'room':
+                candidates += [iid for iid in room['items'] if iid in items and items[iid].get('visible', True)]
+            else:
+                candidates += list(player.get(where, []))
+        scope = candidates
+        self.item_index.ensure(items, scope)
 
-        for iid in candidates:
-            item = self.data['items'].get(iid)
-            if not item:
-                continue
-            if query in item['name'].lower():
-                return item
-
-        return None
+        resolve = self.item_index.resolve_unique if unique else self.item_index.resolve
+        iid = resolve(query, scope)
+        return items.get(iid) if iid else None
 
     def is_self_reference(self, query):
         query = query.lower().strip()
         return query in {'me', 'myself', 'self', 'player', 'my character'}
 
     def move_player(self, d_input):
-        direction = DIRECTION_MAP.get(d_input.lower())
-        if not direction:
-            return "error", "Invalid direction.", None
-
-        curr = self.get_current_room()
-        target_id = curr['exits'].get(direction)
-
-        if not target_id:
-            return "error", "You can't go that way.", curr['id']
-
-        self.data['player']['current_room'] = target_id
-        target = self.get_room(target_id)
+        with self.lock:
+            direction = DIRECTION_MAP.get(d_input.lower())
+            if not direction:
+                return "error", "Invalid direction.", None
+
+            curr = self.get_current_room()
+            target_id = curr['exits'].get(direction)
+
+            if not target_id:
+                return "error", "You can't go that way.", curr['id']
+
+            target = self.get_room(target_id)
+            if target['description'] is None:
+                # Entered only once generated, so a failed generation leaves the player where they were.
+                return "generate", target_id, curr['id']
+
+            self.data['player']['current_room'] = target_id
+            self.mark_dirty('player')
+            self.visit(target)
+            self.describe_room(target)
+            self.save_game()
+            return "ok", target_id, curr['id']
+
+    def visit(self, room):
+        if not room.get('visited'):
+            room['visited'] = True
+            self.mark_dirty('rooms', room['id'])
+            self.exit_graph.update_room(room)
+
+    def travel(self, query):
+        # Walks the shortest known route to the nearest visited room called `query` in one step and one
+        # save. Returns (status, rooms entered): status is "unknown" (no such room), "unreachable", "here"
+        # or "ok". Goals are visited rooms and a stub's only exit leads back, so routes never cross a stub.
+        with self.lock:
+            self.exit_graph.ensure(self)
+            goals = self.exit_graph.find(query)
+            if not goals:
+                return "unknown", []
+            start = self.data['player']['current_room']
+            route = self.exit_graph.path(start, goals)
+            if route is None:
+                return "unreachable", []
+            if not route:
+                return "here", []
+
+            walked = [self.get_room(rid) for _, rid in route]
+            for room in walked:
+                self.visit(room)
+            self.data['player']['current_room'] = walked[-1]['id']
+            self.mark_dirty('player')
+            self.describe_room(walked[-1])
+            self.save_game()
+            return "ok", walked
+
+    def frontier_stubs(self, depth, limit):
+        # Unfilled stubs within `depth` exits of the player, nearest first, as
+        # (stub id, room it is entered from, direction) - the Architect's region batch.
+        start = self.get_current_room()
+        if not start:
+            return []
+        seen = {start['id']}
+        queue = deque([(start, 0)])
+        out = []
+        while queue and len(out) < limit:
+            room, dist = queue.popleft()
+            for direction, rid in room.get('exits', {}).items():
+                if rid in seen:
+                    continue
+                seen.add(rid)
+                target = self.get_room(rid)
+                if target is None:
+                    continue
+                if target.get('description') is None:
+                    out.append((rid, room, direction))
+                    if len(out) >= limit:
+                        break
+                elif dist + 1 < depth:
+                    queue.append((target, dist + 1))
+        return out
 
-        if target['description'] is None:
-            return "generate", target_id, curr['id']
+    def create_room_from_stub(self, stub_id, ai_data):
+        self.create_rooms_from_stubs({stub_id: ai_data})
 
-        target['visited'] = True
-        self.describe_room(target)
+    def create_rooms_from_stubs(self, rooms):
+        # Fills every stub first and saves once, so a region lands in the journal as one delta.
+        for stub_id, ai_data in rooms.items():
+            self._fill_stub(stub_id, ai_data)
         self.save_game()
-        return "ok", target_id, curr['id']
 
-    def create_room_from_stub(self, stub_id, ai_data):
+    def _fill_stub(self, stub_id, ai_data):
         room = self.data['rooms'][stub_id]
         base_desc = ai_data.get('description', '...')
         room['name'] = ai_data.get('name', 'Unknown')
         room['base_description'] = base_desc
         room['description'] = base_desc
+        self.mark_dirty('rooms', stub_id)
 
         for i in ai_data.get('items', []):
             iid = i.get('id', f"item_{uuid.uuid4().hex[:6]}")
-            self.data['items'][iid] = {
+            self.data['items'][iid] = Item({
                 "id": iid,
                 "name": i.get('name', 'thing'),
                 "aliases": [a.lower() for a in i.get('aliases', [])],
                 "description": i.get('description', '...'),
                 "carryable": i.get('is_carryable', True),
                 "visible": i.get('visible', True)
-            }
+            })
             room['items'].append(iid)
+            self.item_index.add(self.data['items'][iid])
+            self.mark_dirty('items', iid)
 
         for d in ai_data.get('new_exits', []):
             norm = DIRECTION_MAP.get(d.lower())
             if norm and norm not in room['exits']:
                 new_id = f"room_{uuid.uuid4().hex[:8]}"
-                self.data['rooms'][new_id] = {
+                self.data['rooms'][new_id] = Room({
                     "id": new_id,
                     "name": "Unknown",
                     "description": None,
@@ -287,74 +544,86 @@ class WorldManager:
                     "items": [],
                     "characters": [],
                     "visited": False
-                }
+                })
                 room['exits'][norm] = new_id
+                self.mark_dirty('rooms', new_id)
+                self.exit_graph.update_room(self.data['rooms'][new_id])
+        self.exit_graph.update_room(room)
         self.describe_room(room)
-        self.save_game()
 
     def update_item_description(self, iid, desc):
         if iid in self.data['items']:
             self.data['items'][iid]['description'] = desc
-
-    def apply_outcome(self, outcome):
-        room = self.get_current_room()
-        player = self.data['player']
-
-        if 'narrative_summary_update' in outcome:
-            self.data['narrative_thread'] = outcome['narrative_summary_update']
-
-        for iid in outcome.get('inventory_add', []):
-            if iid in room['items']:
-                room['items'].remove(iid)
-            if iid not in player['inventory']:
-                player['inventory'].append(iid)
-
-        for iid in outcome.get('inventory_remove', []):
-            if iid in player['inventory']:
-                player['inventory'].remove(iid)
-            if iid not in room['items']:
-                room['items'].append(iid)
-
-        for iid in outcome.get('room_add', []):
-            if iid not in room['items']:
-                room['items'].append(iid)
-
-        for iid in outcome.get('room_remove', []):
-            if iid in room['items']:
-                room['items'].remove(iid)
-
-        for iid in outcome.get('wear_add', []):
-            if iid in player['inventory']:
-                player['inventory'].remove(iid)
-            if iid not in player['worn']:
-                player['worn'].append(iid)
-
-        for iid in outcome.get('wear_remove', []):
-            if iid in player['worn']:
-                player['worn'].remove(iid)
-            if iid not in player['inventory']:
-                player['inventory'].append(iid)
-
-        for iid, desc in outcome.get('update_description', {}).items():
-            self.update_item_description(iid, desc)
-
-        for rid, base_desc in outcome.get('room_base_description_update', {}).items():
-            target_room = self.get_room(rid)
-            if target_room:
-                target_room['base_description'] = base_desc
-
-        if 'current_room_base_description' in outcome and room:
-            room['base_description'] = outcome['current_room_base_description']
-
-        if 'player_description_update' in outcome:
-            player['description'] = outcome['player_description_update']
-
-        for iid, vis in outcome.get('item_visibility_update', {}).items():
-            if iid in self.data['items']:
-                self.data['items'][iid]['visible'] = bool(vis)
-
-        self.describe_room(room)
-        self.save_game()
+            self.item_index.add(self.data['items'][iid])
+            self.mark_dirty('items', iid)
+
+    def apply_outcome(self, outcome, user_input=None):
+        with self.lock:
+            room = self.get_current_room()
+            player = self.data['player']
+            self.mark_dirty('player')
+            if room:
+                self.mark_dirty('rooms', room['id'])
+
+            if 'narrative_summary_update' in outcome:
+                self.data['narrative_thread'] = outcome['narrative_summary_update']
+                self.mark_dirty('narrative_thread')
+
+            # Room and player contents are IdSets: add keeps the existing position, discard ignores absent ids.
+            for iid in outcome.get('inventory_add', []):
+                room['items'].discard(iid)
+                player['inventory'].add(iid)
+
+            for iid in outcome.get('inventory_remove', []):
+                player['inventory'].discard(iid)
+                room['items'].add(iid)
+
+            for iid in outcome.get('room_add', []):
+                room['items'].add(iid)
+
+            for iid in outcome.get('room_remove', []):
+                room['items'].discard(iid)
+
+            for iid in outcome.get('wear_add', []):
+                player['inventory'].discard(iid)
+                player['worn'].add(iid)
+
+            for iid in outcome.get('wear_remove', []):
+                player['worn'].discard(iid)
+                player['inventory'].add(iid)
+
+            for iid, desc in outcome.get('update_description', {}).items():
+                self.update_item_description(iid, desc)
+
+            for rid, base_desc in outcome.get('room_base_description_update', {}).items():
+                target_room = self.get_room(rid)
+                if target_room:
+                    target_room['base_description'] = base_desc
+                    self.mark_dirty('rooms', rid)
+
+            if 'current_room_base_description' in outcome and room:
+                room['base_description'] = outcome['current_room_base_description']
+
+            if 'player_description_update' in outcome:
+                player['description'] = outcome['player_description_update']
+
+            for iid, vis in outcome.get('item_visibility_update', {}).items():
+                if iid in self.data['items']:
+                    self.data['items'][iid]['visible'] = bool(vis)
+                    self.mark_dirty('items', iid)
+
+            self.describe_room(room)
+            self.save_game()
+            if user_input and not outcome.get('error'):
+                self.memory.record(make_event(room, user_input, outcome, self.item_name))
+
+    def item_name(self, iid):
+        item = self.data['items'].get(iid)
+        return item.get('name', iid) if item else iid
+
+    def item_names(self, ids):
+        items = self.data['items']
+        return [items[iid]['name'] for iid in ids if iid in items]
 
     def get_opposite_dir(self, d):
         return {
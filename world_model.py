@@ -0,0 +1,214 @@
+import sys
+from collections.abc import MutableMapping
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# Insertion-ordered set of interned ids. Keeps the list calls the engine already makes on room and
+# player contents (append/remove/in/iteration/indexing) but membership and removal are O(1).
+class IdSet:
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids=()):
+        self._ids = dict.fromkeys(intern(i) for i in ids)
+
+    def append(self, iid):
+        self._ids[intern(iid)] = None
+
+    add = append
+
+    def remove(self, iid):
+        try:
+            del self._ids[iid]
+        except KeyError:
+            raise ValueError(f"{iid!r} not in IdSet") from None
+
+    def discard(self, iid):
+        self._ids.pop(iid, None)
+
+    def __contains__(self, iid):
+        return iid in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        return list(self._ids)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (IdSet, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"IdSet({list(self._ids)!r})"
+
+
+def plain(value):
+    # Save-format (JSON-ready) form of model values; also usable as json.dumps(default=plain).
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (IdSet, tuple)):
+        return list(value)
+    return value
+
+
+def slots(fields):
+    # Slot names are prefixed so fields like 'items' don't shadow the mapping methods.
+    return {field: f"_{field}" for field in fields}
+
+
+# Base for the slotted world records. Known keys live in slots (unset slot = key absent); anything
+# else the save or the LLM adds goes to `extra`, so dict(record) round-trips the save JSON exactly.
+# The mapping protocol keeps record['items'], record.get('exits') and friends working unchanged.
+class Record(MutableMapping):
+    __slots__ = ('extra',)
+    FIELDS = ()
+    SLOTS = {}
+    ID_FIELDS = frozenset(('id',))
+    SET_FIELDS = frozenset()
+
+    def __init__(self, fields=()):
+        self.extra = None
+        for key, value in dict(fields).items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(data)
+
+    def to_dict(self):
+        return {key: plain(value) for key, value in self.items()}
+
+    def __getitem__(self, key):
+        attr = self.SLOTS.get(key)
+        if attr:
+            try:
+                return getattr(self, attr)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        attr = self.SLOTS.get(key)
+        if not attr:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+            return
+        if key in self.SET_FIELDS:
+            value = value if isinstance(value, IdSet) else IdSet(value or ())
+        elif key in self.ID_FIELDS:
+            value = intern(value)
+        elif key == 'aliases':
+            value = tuple(intern(a) for a in value or ())
+        elif key == 'exits':
+            value = {intern(d): intern(rid) for d, rid in (value or {}).items()}
+        setattr(self, attr, value)
+
+    def __delitem__(self, key):
+        attr = self.SLOTS.get(key)
+        if attr:
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key, attr in self.SLOTS.items():
+            if hasattr(self, attr):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+# Id -> record table over a plain save dict that converts each record the first time it is read, so
+# opening a large JSON save costs one json.load instead of building a Record for every room and item.
+# Shares the `on_load` / `loaded()` interface of world_db.LazyTable.
+class RecordTable(MutableMapping):
+    def __init__(self, raw, on_load=None):
+        self.on_load = on_load
+        self._data = raw
+        self._converted = set()
+
+    def __getitem__(self, key):
+        record = self._data[key]
+        if key not in self._converted:
+            if self.on_load:
+                record = self.on_load(record)
+                self._data[key] = record
+            self._converted.add(key)
+        return record
+
+    def __setitem__(self, key, record):
+        self._data[key] = record
+        self._converted.add(key)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._converted.discard(key)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def loaded(self):
+        return [self._data[key] for key in self._converted if key in self._data]
+
+    def adjacency(self):
+        # Rooms table only: (id, exits, name, visited) read straight off raw and converted records alike.
+        return [(key, r.get('exits', {}), r.get('name'), r.get('visited')) for key, r in self._data.items()]
+
+
+class Room(Record):
+    FIELDS = ('id', 'name', 'description', 'base_description', 'exits', 'items', 'characters', 'visited')
+    SLOTS = slots(FIELDS)
+    SET_FIELDS = frozenset(('items', 'characters'))
+    __slots__ = tuple(SLOTS.values())
+
+
+class Item(Record):
+    FIELDS = ('id', 'name', 'aliases', 'description', 'carryable', 'visible')
+    SLOTS = slots(FIELDS)
+    __slots__ = tuple(SLOTS.values())
+
+
+class Player(Record):
+    FIELDS = ('current_room', 'inventory', 'description', 'aliases', 'worn')
+    SLOTS = slots(FIELDS)
+    ID_FIELDS = frozenset(('current_room',))
+    SET_FIELDS = frozenset(('inventory', 'worn'))
+    __slots__ = tuple(SLOTS.values())
+
+
+def to_save(data):
+    # Whole-world conversion back to the save JSON layout (used for full snapshots).
+    out = {}
+    for key, value in data.items():
+        if key in ('rooms', 'items'):
+            out[key] = {rid: plain(record) for rid, record in value.items()}
+        else:
+            out[key] = plain(value)
+    return out
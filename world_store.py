@@ -0,0 +1,136 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from world_db import DB_SUFFIX
+from world_manager import WorldManager
+
+SAVE_DIR = os.environ.get("FROTZ_SAVE_DIR", "saves")
+MAX_HOT_WORLDS = int(os.environ.get("FROTZ_MAX_HOT_WORLDS", "256"))
+# Rooms plus items held in memory across all hot worlds (0 = no limit); lazily loaded worlds count loaded rows.
+MAX_HOT_RECORDS = int(os.environ.get("FROTZ_MAX_HOT_RECORDS", "500000"))
+IDLE_EVICT_SECONDS = int(os.environ.get("FROTZ_IDLE_EVICT_SECONDS", "900"))
+# Eviction runs on the request path at most this often.
+EVICT_SWEEP_SECONDS = float(os.environ.get("FROTZ_EVICT_SWEEP_SECONDS", "5"))
+# A request holds its world between get() and entering the world's actor; worlds used this recently stay.
+EVICT_GRACE_SECONDS = 5.0
+# "json": snapshot + delta journal per world; "sqlite": one WAL-mode database per world, loaded lazily.
+STORAGE_BACKEND = os.environ.get("FROTZ_STORAGE", "json")
+SESSION_COOKIE = "frotz_session"
+
+SESSION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+# Hot worlds by session, least recently used first. Every get() may sweep: worlds over the count or
+# record budget, or idle past IDLE_EVICT_SECONDS, are saved and dropped, except worlds with commands
+# queued or running, or with background work `busy(world)` reports (pending room prefetches).
+# Evicting those would let the next request load a second WorldManager writing the same save.
+class WorldStore:
+    def __init__(self, save_dir=SAVE_DIR, max_worlds=MAX_HOT_WORLDS, idle_seconds=IDLE_EVICT_SECONDS,
+                 max_records=MAX_HOT_RECORDS, sweep_seconds=EVICT_SWEEP_SECONDS, busy=None):
+        self.save_dir = save_dir
+        self.max_worlds = max(1, max_worlds)
+        self.idle_seconds = idle_seconds
+        self.max_records = max_records
+        self.sweep_seconds = sweep_seconds
+        self.busy = busy or (lambda _world: False)
+        self._worlds = OrderedDict()  # session id -> [world, last_used], least recently used first
+        self._loading = {}  # session id -> Future of the world being read from disk
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def new_session_id(self):
+        return uuid.uuid4().hex
+
+    def is_valid_session_id(self, sid):
+        return bool(sid) and SESSION_ID_RE.match(sid) is not None
+
+    def save_path(self, sid):
+        suffix = DB_SUFFIX if STORAGE_BACKEND == "sqlite" else ".json"
+        return os.path.join(self.save_dir, f"{sid}{suffix}")
+
+    def get(self, sid):
+        if not self.is_valid_session_id(sid):
+            raise ValueError(f"Invalid session id: {sid!r}")
+
+        with self._lock:
+            entry = self._worlds.get(sid)
+            if entry:
+                entry[1] = time.monotonic()
+                self._worlds.move_to_end(sid)
+            else:
+                loading = self._loading.get(sid)
+                leader = loading is None
+                if leader:
+                    loading = self._loading[sid] = Future()
+        if entry:
+            self.sweep()
+            return entry[0]
+        if not leader:
+            return loading.result()
+
+        # Load outside the registry lock so a slow disk read only stalls this session; concurrent
+        # first requests for it wait on the same load instead of opening the save twice.
+        try:
+            world = WorldManager(self.save_path(sid))
+        except BaseException as e:
+            with self._lock:
+                del self._loading[sid]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            self._worlds[sid] = [world, time.monotonic()]
+            del self._loading[sid]
+        loading.set_result(world)
+        self.sweep(force=True)
+        return world
+
+    def sweep(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_sweep:
+                return 0
+            self._next_sweep = now + self.sweep_seconds
+            evicted = self._pop_evictable(now)
+        for world in evicted:
+            self._evict(world)
+        return len(evicted)
+
+    def _pop_evictable(self, now):
+        count = len(self._worlds)
+        records = sum(world.footprint() for world, _ in self._worlds.values()) if self.max_records else 0
+        evicted = []
+        for sid, (world, last_used) in list(self._worlds.items()):
+            over = count > self.max_worlds or (self.max_records and records > self.max_records)
+            if not over and now - last_used < self.idle_seconds:
+                break
+            if now - last_used < EVICT_GRACE_SECONDS or world.actor.depth() or self.busy(world):
+                continue
+            del self._worlds[sid]
+            evicted.append(world)
+            count -= 1
+            if self.max_records:
+                records -= world.footprint()
+        return evicted
+
+    def _evict(self, world, force=False):
+        if world.is_initialized():
+            with world.lock:
+                world.save_game(force=force)
+        world.close()
+
+    def flush_all(self):
+        # Shutdown: write every hot world, busy or not, and forget them so a second call is a no-op.
+        with self._lock:
+            worlds = [entry[0] for entry in self._worlds.values()]
+            self._worlds.clear()
+        for world in worlds:
+            self._evict(world, force=True)
+        return len(worlds)
+
+    def __len__(self):
+        return len(self._worlds)